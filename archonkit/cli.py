@@ -1,92 +1,87 @@
-import secrets
+import ast
+import importlib
+import importlib.util
 
 import click
-import typer
-from alembic import command as alembic_cmd
-from alembic.config import Config
 
-from .helpers import create_app, create_feature, inject_feature_to_main
 
-app = typer.Typer()
+class LazyGroup(click.Group):
+    """
+    Click group that imports a command's module only when it is dispatched.
 
+    `lazy_commands` maps a command name to "module:function". For `--help`
+    the short help is read from the function's docstring by parsing the
+    module's source, so listing commands doesn't import every command
+    module (and Alembic/SQLAlchemy with them).
+    """
 
-@click.group()
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(":")
+            module = importlib.import_module(module_name, __package__)
+            self.add_command(getattr(module, attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def lazy_help(self, cmd_name):
+        """The docstring of a command that hasn't been imported, without importing it."""
+        module_name, attr = self.lazy_commands[cmd_name].split(":")
+        spec = importlib.util.find_spec(module_name, __package__)
+        with open(spec.origin, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=spec.origin)
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == attr:
+                return ast.get_docstring(node) or ""
+        return ""
+
+    def format_commands(self, ctx, formatter):
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        # Same width calculation as click.Group.format_commands
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name in self.lazy_commands and name not in self.commands:
+                # A bare Command gives the docstring the same short-help treatment
+                placeholder = click.Command(name, help=self.lazy_help(name))
+                rows.append((name, placeholder.get_short_help_str(limit)))
+            else:
+                command = self.get_command(ctx, name)
+                if command is not None and not command.hidden:
+                    rows.append((name, command.get_short_help_str(limit)))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_commands={
+        "new": ".commands.scaffold:new",
+        "feature": ".commands.scaffold:feature",
+        "keygen": ".commands.keys:keygen",
+        "compiletemplates": ".commands.assets:compiletemplates",
+        "collectstatic": ".commands.assets:collectstatic",
+        "startupreport": ".commands.features:startupreport",
+        "buildadmin": ".commands.features:buildadmin",
+        "serve": ".commands.serve:serve",
+        "bench": ".commands.bench:bench",
+        "makemigrations": ".commands.migrations:makemigrations",
+        "migrate": ".commands.migrations:migrate",
+        "rollback": ".commands.migrations:rollback",
+    },
+)
 def archonkit():
     """ArchonKit CLI: FastAPI/Django-style scaffolding."""
     pass
 
 
-# Scaffold App
-@archonkit.command()
-@click.argument("app_name")
-def new(app_name):
-    """Create a new top-level app/project."""
-    create_app(app_name)
-    click.echo(f"Created new app: {app_name}")
-
-
-# Scaffold Feature
-@archonkit.command()
-@click.argument("feature_name")
-@click.argument("app_dir", default=".")
-def feature(feature_name, app_dir):
-    """Add a modular app (users, blog, etc.) and inject into main.py."""
-    create_feature(feature_name)
-    inject_feature_to_main(app_dir, feature_name)
-    click.echo(
-        f"Added feature structure for: {feature_name} and wired it into {app_dir}/main.py"
-    )
-
-
-# Generate Key for SECRET_KEY
-@archonkit.command()
-@click.option(
-    "--length",
-    default=64,
-    help="Length of the secret key (default: 64 bytes, prints 128 hex characters).",
-)
-def keygen(length):
-    """Generate a cryptographically secure secret key."""
-    key = secrets.token_hex(length)
-    click.echo(f"Your secret key:\n{key}")
-
-
-# ALEMBIC COMMANDS
-def get_alembic_config():
-    return Config("alembic.ini")
-
-
-@archonkit.command()
-@click.argument("message")
-def makemigrations(message):
-    """Create a new Alembic migration with autogeneration and a message."""
-    cfg = get_alembic_config()
-    alembic_cmd.revision(cfg, message=message, autogenerate=True)
-    click.echo(f"Migration created: {message}")
-
-
-@archonkit.command()
-def migrate():
-    """Apply all Alembic migrations (upgrade head)."""
-    cfg = get_alembic_config()
-    alembic_cmd.upgrade(cfg, "head")
-    click.echo("Database upgraded to head.")
-
-
-@archonkit.command()
-@click.argument("revision", default="-1")
-def rollback(revision):
-    """
-    Downgrade (rollback) the database schema.
-    By default, rolls back one migration step.
-    Example: archonkit rollback         # rollback one step
-             archonkit rollback base    # rollback to base
-             archonkit rollback <rev>   # rollback to a specific revision
-    """
-    cfg = get_alembic_config()
-    alembic_cmd.downgrade(cfg, revision)
-    click.echo(f"Database rolled back to revision: {revision}")
-
-
 if __name__ == "__main__":
     archonkit()
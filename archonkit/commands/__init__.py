@@ -0,0 +1,11 @@
+import importlib
+import os
+import sys
+
+
+def import_project_module(name):
+    """Import a module (e.g. 'core.templates') from the project in the current directory."""
+    cwd = os.getcwd()
+    if cwd not in sys.path:
+        sys.path.insert(0, cwd)
+    return importlib.import_module(name)
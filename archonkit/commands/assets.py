@@ -0,0 +1,25 @@
+import click
+
+from ..helpers import collect_static
+from . import import_project_module
+
+
+# Precompile Jinja2 templates into the bytecode cache
+@click.command()
+def compiletemplates():
+    """Compile every template into the shared bytecode cache (run at deploy time)."""
+    templates = import_project_module("core.templates")
+    count = templates.precompile()
+    click.echo(f"Compiled {count} templates into {templates.settings.TEMPLATE_CACHE_DIR}")
+
+
+# Collect feature static files for production
+@click.command()
+@click.option("--output", default=None, help="Output directory [default: settings.STATIC_ROOT].")
+@click.option("--no-compress", is_flag=True, help="Skip the .gz/.br variants.")
+def collectstatic(output, no_compress):
+    """Gather every feature's static/ into one tree with hashed names and a manifest."""
+    if output is None:
+        output = import_project_module("core.config").settings.STATIC_ROOT
+    manifest = collect_static(".", output, compress=not no_compress)
+    click.echo(f"Collected {len(manifest)} static files into {output}")
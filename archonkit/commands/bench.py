@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+
+import click
+
+
+# Framework benchmark
+@click.command()
+@click.option("--iterations", default=1000, show_default=True, help="Measured iterations per scenario.")
+@click.option("--concurrency", default=1, show_default=True, help="Concurrent in-process clients.")
+@click.option("--warmup", default=50, show_default=True, help="Unmeasured iterations per client.")
+@click.option("--scenario", "scenarios", multiple=True, help="Only run these scenarios (repeatable).")
+@click.option("--async-db", is_flag=True, help="Benchmark an --async-db scaffold (needs aiosqlite).")
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default="bench-results.json",
+    show_default=True,
+    help="Where to write the JSON report.",
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False),
+    help="A previous report to compare against.",
+)
+def bench(iterations, concurrency, warmup, scenarios, async_db, output, compare):
+    """Scaffold a throwaway app on SQLite and measure requests/sec and latency."""
+    from ..helpers.bench import SCENARIOS, compare_results, run_bench, scaffold_bench_app, write_report
+
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise click.BadParameter(
+            f"unknown scenario(s) {', '.join(sorted(unknown))}; choose from {', '.join(SCENARIOS)}",
+            param_hint="--scenario",
+        )
+
+    output = os.path.abspath(output)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            app_dir = scaffold_bench_app(tmp, async_db=async_db)
+            report = run_bench(app_dir, list(scenarios), iterations, concurrency, warmup)
+        finally:
+            os.chdir(cwd)
+
+    click.echo(f"{'scenario':<16} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, result in report["results"].items():
+        click.echo(f"{name:<16} {result['rps']:>10.1f} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+
+    write_report(report, output)
+    click.echo(f"Results written to {output}")
+
+    if compare:
+        with open(compare) as f:
+            previous = json.load(f)
+        click.echo(f"Compared with {compare}:")
+        for line in compare_results(previous, report):
+            click.echo(f"  {line}")
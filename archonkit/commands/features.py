@@ -0,0 +1,27 @@
+import click
+
+from . import import_project_module
+
+
+# Per-feature startup report
+@click.command()
+def startupreport():
+    """Import every feature in core/registry.py and report how long each one takes."""
+    from fastapi import FastAPI
+
+    registry = import_project_module("core.registry")
+    app = FastAPI()
+    for name in registry.FEATURES:
+        registry.load_feature(app, name)
+    click.echo(registry.report())
+
+
+# Admin discovery manifest
+@click.command()
+def buildadmin():
+    """Scan ADMIN_MODULES for ModelView classes and write the admin manifest."""
+    admin_loader = import_project_module("core.admin_loader")
+    views = admin_loader.build_manifest()
+    click.echo(
+        f"Wrote {len(views)} admin views to {admin_loader.settings.ADMIN_MANIFEST}"
+    )
@@ -0,0 +1,16 @@
+import secrets
+
+import click
+
+
+# Generate Key for SECRET_KEY
+@click.command()
+@click.option(
+    "--length",
+    default=64,
+    help="Length of the secret key (default: 64 bytes, prints 128 hex characters).",
+)
+def keygen(length):
+    """Generate a cryptographically secure secret key."""
+    key = secrets.token_hex(length)
+    click.echo(f"Your secret key:\n{key}")
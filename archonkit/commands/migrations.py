@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+import click
+from alembic import command as alembic_cmd
+from alembic.config import Config
+
+
+# ALEMBIC COMMANDS
+def get_alembic_config():
+    return Config("alembic.ini")
+
+
+def env_uses_alembic_options(cfg):
+    """True if alembic/env.py passes core.migrations.alembic_options to configure()."""
+    env_py = os.path.join(cfg.get_main_option("script_location") or "alembic", "env.py")
+    try:
+        with open(env_py) as f:
+            return "alembic_options" in f.read()
+    except FileNotFoundError:
+        return False
+
+
+@click.command()
+@click.argument("message")
+@click.option(
+    "--feature",
+    default=None,
+    help="Only reflect and compare the tables defined in <feature>/models.py.",
+)
+def makemigrations(message, feature):
+    """Create a new Alembic migration with autogeneration and a message."""
+    cfg = get_alembic_config()
+    if feature and not env_uses_alembic_options(cfg):
+        raise click.ClickException(
+            "--feature needs alembic/env.py to call "
+            "context.configure(..., **alembic_options(config, connection)) "
+            "from core.migrations."
+        )
+
+    cfg.attributes["archonkit_feature"] = feature
+    timings = cfg.attributes["archonkit_timings"] = {}
+    start = time.perf_counter()
+    alembic_cmd.revision(cfg, message=message, autogenerate=True)
+    end = time.perf_counter()
+    click.echo(f"Migration created: {message}")
+
+    if "configured" in timings and "compared" in timings:
+        load = timings["configured"] - start
+        reflect = timings["reflect"]
+        compare = timings["compared"] - timings["configured"] - reflect
+        render = end - timings["compared"]
+        click.echo(
+            f"  load {load:.2f}s | reflect {reflect:.2f}s | "
+            f"compare {compare:.2f}s | render {render:.2f}s | total {end - start:.2f}s"
+        )
+
+
+def run_with_report(cfg, operation, revision, sql, report):
+    """Run an Alembic upgrade/downgrade, printing how long each revision took."""
+    revisions = cfg.attributes["archonkit_revisions"] = []
+    if not sql and not env_uses_alembic_options(cfg):
+        click.echo(
+            "Warning: alembic/env.py doesn't pass core.migrations.alembic_options to "
+            "context.configure(), so per-revision timings are unavailable.",
+            err=True,
+        )
+    start = time.perf_counter()
+    operation(cfg, revision, sql=sql)
+    total = time.perf_counter() - start
+    if sql:
+        return
+
+    for step in revisions:
+        click.echo(f"  {step['seconds']:8.2f}s  {step['direction']:<9} {step['revision']}  {step['message']}")
+    click.echo(f"  {total:8.2f}s  total")
+    if report:
+        with open(report, "w") as f:
+            json.dump({"total_seconds": round(total, 4), "revisions": revisions}, f, indent=2)
+        click.echo(f"Timing report written to {report}")
+
+
+@click.command()
+@click.argument("revision", default="head")
+@click.option("--sql", is_flag=True, help="Print the SQL instead of running it (offline mode).")
+@click.option("--report", type=click.Path(dir_okay=False), help="Write per-revision timings as JSON.")
+def migrate(revision, sql, report):
+    """Apply Alembic migrations (upgrade head by default)."""
+    cfg = get_alembic_config()
+    run_with_report(cfg, alembic_cmd.upgrade, revision, sql, report)
+    if not sql:
+        click.echo(f"Database upgraded to {revision}.")
+
+
+@click.command()
+@click.argument("revision", default="-1")
+@click.option("--sql", is_flag=True, help="Print the SQL instead of running it (needs a FROM:TO range).")
+@click.option("--report", type=click.Path(dir_okay=False), help="Write per-revision timings as JSON.")
+def rollback(revision, sql, report):
+    """
+    Downgrade (rollback) the database schema.
+    By default, rolls back one migration step.
+    Example: archonkit rollback         # rollback one step
+             archonkit rollback base    # rollback to base
+             archonkit rollback <rev>   # rollback to a specific revision
+             archonkit rollback head:-1 --sql   # print the rollback SQL
+    """
+    cfg = get_alembic_config()
+    run_with_report(cfg, alembic_cmd.downgrade, revision, sql, report)
+    if not sql:
+        click.echo(f"Database rolled back to revision: {revision}")
@@ -0,0 +1,51 @@
+import keyword
+import os
+
+import click
+
+from ..helpers import create_app, create_features, inject_features_to_main
+
+
+# Scaffold App
+@click.command()
+@click.argument("app_name")
+@click.option(
+    "--async-db",
+    is_flag=True,
+    help="Scaffold an async SQLAlchemy engine/session (AsyncSession) instead of a sync one.",
+)
+def new(app_name, async_db):
+    """Create a new top-level app/project."""
+    create_app(app_name, async_db=async_db)
+    click.echo(f"Created new app: {app_name}")
+
+
+# Scaffold Feature(s)
+@click.command()
+@click.argument("feature_names", nargs=-1, required=True)
+@click.option("--app-dir", default=".", help="Directory containing main.py.")
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Render the boilerplate route with stream_template instead of TemplateResponse.",
+)
+def feature(feature_names, app_dir, stream):
+    """Add one or more modular apps (users, blog, etc.) and inject them into main.py."""
+    feature_names = list(feature_names)
+    for name in feature_names:
+        # Features are imported as packages ("import <name>.routes")
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise click.BadParameter(
+                f"'{name}' is not a valid Python package name; use letters, digits and underscores.",
+                param_hint="FEATURE_NAMES",
+            )
+        if os.path.isfile(os.path.join(name, "main.py")):
+            # The old `archonkit feature <name> <app_dir>` form
+            raise click.UsageError(
+                f"'{name}' is an app directory, not a feature name; pass it with --app-dir."
+            )
+
+    create_features(feature_names, streaming=stream)
+    inject_features_to_main(app_dir, feature_names)
+    main_py = os.path.normpath(os.path.join(app_dir, "main.py"))
+    click.echo(f"Added feature structure for: {', '.join(feature_names)} and wired it into {main_py}")
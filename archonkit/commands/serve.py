@@ -0,0 +1,49 @@
+import os
+
+import click
+
+
+# Production server
+@click.command()
+@click.option("--app", "app_path", default="main:app", show_default=True, help="ASGI app to serve.")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8000, show_default=True, type=int)
+@click.option("--workers", "-w", type=int, default=None, help="Worker processes [default: CPU count].")
+@click.option(
+    "--preload/--no-preload",
+    default=True,
+    show_default=True,
+    help="Import the app once before forking so workers share it copy-on-write.",
+)
+@click.option("--max-requests", default=0, show_default=True, help="Recycle a worker after this many requests (0: never).")
+@click.option("--max-requests-jitter", default=0, show_default=True, help="Random extra requests per worker, to stagger recycling.")
+@click.option("--max-memory", default=0, show_default=True, help="Recycle a worker once its RSS exceeds this many MiB (0: never).")
+@click.option("--graceful-timeout", default=30, show_default=True, help="Seconds a stopping worker may spend finishing requests.")
+@click.option("--log-level", default="info", show_default=True)
+def serve(
+    app_path, host, port, workers, preload, max_requests, max_requests_jitter,
+    max_memory, graceful_timeout, log_level,
+):
+    """Run the app with N uvicorn worker processes (uvloop/httptools when installed)."""
+    from ..helpers.server import per_process_stores, serve as run_server
+
+    if (workers or os.cpu_count() or 1) > 1:
+        stores = per_process_stores()
+        if stores:
+            raise click.ClickException(
+                f"{', '.join(stores)} keeps data in one worker's memory, so it is lost "
+                "between workers. Use 'sql' (or a shared backend), or run with --workers 1."
+            )
+
+    run_server(
+        app=app_path,
+        host=host,
+        port=port,
+        workers=workers,
+        preload=preload,
+        max_requests=max_requests,
+        max_requests_jitter=max_requests_jitter,
+        max_memory=max_memory * 2**20,
+        graceful_timeout=graceful_timeout,
+        log_level=log_level,
+    )
@@ -1,4 +1,17 @@
 from .app_scaffold import create_app
-from .feature_scaffold import create_feature, inject_feature_to_main
+from .collectstatic import collect_static
+from .feature_scaffold import (
+    create_feature,
+    create_features,
+    inject_feature_to_main,
+    inject_features_to_main,
+)
 
-__all__ = ["create_app", "create_feature", "inject_feature_to_main"]
+__all__ = [
+    "create_app",
+    "collect_static",
+    "create_feature",
+    "create_features",
+    "inject_feature_to_main",
+    "inject_features_to_main",
+]
@@ -1,7 +1,7 @@
 import os
 
 
-def create_app(app_name):
+def create_app(app_name, async_db=False):
     os.makedirs(f"{app_name}/core", exist_ok=True)
     os.makedirs(f"{app_name}/templates", exist_ok=True)
 
@@ -9,18 +9,56 @@ def create_app(app_name):
     with open(f"{app_name}/templates/index.html", "w") as f:
         f.write("<h1>{{ msg }}</h1>")
 
+    # Create templates/pagination.html (macros for core/pagination.py)
+    pagination_html = '''
+{# Usage: {% from "pagination.html" import pager %}{{ pager(page, request) }} #}
+{% macro pager(page, request, param="cursor") %}
+<nav class="pagination" aria-label="Pagination">
+  {% if page.has_prev %}<a rel="prev" href="{{ page_url(request, page.prev_cursor, param) }}">&laquo; Previous</a>{% endif %}
+  {% if page.total_label %}<span class="pagination-total">{{ page.total_label }} results</span>{% endif %}
+  {% if page.has_next %}<a rel="next" href="{{ page_url(request, page.next_cursor, param) }}">Next &raquo;</a>{% endif %}
+</nav>
+{% endmacro %}
+'''.lstrip()
+    with open(f"{app_name}/templates/pagination.html", "w") as f:
+        f.write(pagination_html)
+
     # Create main.py (as before)
     main_py_content = """
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
 from core.config import settings
+from core.sessions import CookieSessionMiddleware, ServerSessionMiddleware, get_session_backend
+from core.messages import MessageMiddleware
+from core.csrf import CSRFMiddleware
+from core.middleware import CompressionMiddleware, ConditionalGetMiddleware
+from core.templates import templates
+from core.staticfiles import static_app
+from core import registry
 
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
-templates = Jinja2Templates(directory="templates")
+app.mount("/static", static_app, name="static")
+registry.install(app)
+# Inside the session middleware: flash messages are saved before the session is
+# serialized, so they go out with this response's cookie or backend write
+app.add_middleware(MessageMiddleware)
+if settings.CSRF_MIDDLEWARE:
+    app.add_middleware(CSRFMiddleware)
+if settings.SESSION_BACKEND == "cookie":
+    app.add_middleware(CookieSessionMiddleware, secret_key=settings.SECRET_KEY, max_age=settings.SESSION_MAX_AGE)
+else:
+    app.add_middleware(ServerSessionMiddleware, backend=get_session_backend(), max_age=settings.SESSION_MAX_AGE)
+# 304s for unchanged HTML, then gzip/brotli on the way out
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware)
+if settings.debug:
+    from core import nplusone
+
+    nplusone.install(app)
+if settings.METRICS_ENABLED:
+    from core import metrics
+
+    metrics.install(app)
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
@@ -30,7 +68,36 @@ async def root(request: Request):
         f.write(main_py_content)
 
     # Create core/database.py
-    database_py = """
+    if async_db:
+        database_py = """
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from core.config import settings
+
+# DATABASE_URL must use an async driver, e.g. sqlite+aiosqlite:// or postgresql+asyncpg://
+if settings.DATABASE_URL.startswith("sqlite"):
+    engine = create_async_engine(settings.DATABASE_URL)
+else:
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+# Registers the query cache's session events (commit-time invalidation)
+from core import query_cache  # noqa: E402,F401
+""".lstrip()
+    else:
+        database_py = """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from core.config import settings
@@ -38,7 +105,13 @@ from core.config import settings
 if settings.DATABASE_URL.startswith("sqlite"):
     engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
 else:
-    engine = create_engine(settings.DATABASE_URL)
+    engine = create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -49,6 +122,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Registers the query cache's session events (commit-time invalidation)
+from core import query_cache  # noqa: E402,F401
 """.lstrip()
     with open(f"{app_name}/core/database.py", "w") as f:
         f.write(database_py)
@@ -67,11 +143,78 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     DEBUG: str = os.getenv("DEBUG")
-    
+    TEMPLATE_CACHE_DIR: str = os.getenv("TEMPLATE_CACHE_DIR", ".jinja_cache")
+    RENDER_CACHE_MAXSIZE: int = int(os.getenv("RENDER_CACHE_MAXSIZE", "512"))
+    STATIC_ROOT: str = os.getenv("STATIC_ROOT", "staticfiles")
+    STATIC_URL: str = os.getenv("STATIC_URL", "/static/")
+
+    # Response compression (brotli when installed, else gzip) for bodies of at least this size
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "4"))
+
+    # "lazy" imports feature routers on first request, "eager" imports them at boot;
+    # unset: lazy with DEBUG (fast reloads), eager otherwise
+    FEATURE_LOADING: str = os.getenv("FEATURE_LOADING", "")
+    ADMIN_MANIFEST: str = os.getenv("ADMIN_MANIFEST", "core/admin_manifest.json")
+    LOGIN_URL: str = os.getenv("LOGIN_URL", "/users/login")
+    AUTH_USER_MODEL: str = os.getenv("AUTH_USER_MODEL", "users.models.User")
+
+    # Per-process cache of user rows used by login_required (0 disables it)
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", "0"))
+    USER_CACHE_MAXSIZE: int = int(os.getenv("USER_CACHE_MAXSIZE", "1024"))
+
+    # argon2 cost parameters and the size of the async hashing pool
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+    # "cookie" (signed cookie), "memory", "sql" or a dotted path to a SessionBackend
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "cookie")
+    SESSION_MAX_AGE: int = int(os.getenv("SESSION_MAX_AGE", str(14 * 24 * 60 * 60)))
+
+    # Signed CSRF tokens; CSRF_MIDDLEWARE checks every POST/PUT/PATCH/DELETE
+    # except under the comma-separated CSRF_EXEMPT prefixes
+    CSRF_TOKEN_MAX_AGE: int = int(os.getenv("CSRF_TOKEN_MAX_AGE", str(12 * 60 * 60)))
+    CSRF_MIDDLEWARE: bool = os.getenv("CSRF_MIDDLEWARE", "false").lower() in ("1", "true", "yes")
+    CSRF_EXEMPT: str = os.getenv("CSRF_EXEMPT", "/admin")
+
+    # "session" keeps flash messages in the session; "server" keeps them in
+    # MESSAGE_BACKEND ("memory", "sql" or a dotted path) and only an id in the session;
+    # "memory" is per process, so `archonkit serve` refuses it with several workers
+    MESSAGE_STORAGE: str = os.getenv("MESSAGE_STORAGE", "session")
+    MESSAGE_BACKEND: str = os.getenv("MESSAGE_BACKEND", "memory")
+
+    # Prometheus metrics middleware, served on METRICS_PATH when enabled
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    METRICS_PATH: str = os.getenv("METRICS_PATH", "/metrics")
+
+    # DEBUG-only N+1 detector: statements repeated this often in one request are
+    # reported; NPLUSONE_RAISE turns the warning into an error (for tests)
+    NPLUSONE_THRESHOLD: int = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+    NPLUSONE_RAISE: bool = os.getenv("NPLUSONE_RAISE", "false").lower() in ("1", "true", "yes")
+
+    # Opt-in query result cache (core/query_cache.py): "memory" or a dotted path
+    # to a QueryCacheBackend shared by every worker
+    QUERY_CACHE_BACKEND: str = os.getenv("QUERY_CACHE_BACKEND", "memory")
+    QUERY_CACHE_TTL: int = int(os.getenv("QUERY_CACHE_TTL", "60"))
+    QUERY_CACHE_MAXSIZE: int = int(os.getenv("QUERY_CACHE_MAXSIZE", "1024"))
+
+    # Connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
+    @property
+    def debug(self) -> bool:
+        return str(self.DEBUG).lower() in ("1", "true", "yes", "on")
+
 settings = Settings()
 """.lstrip()
     with open(f"{app_name}/core/config.py", "w") as f:
@@ -80,10 +223,20 @@ settings = Settings()
     # Create core/utils.py
     utils_py = '''
 from passlib.context import CryptContext
+import asyncio
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from core.config import settings
+from core.csrf import check_token, csrf_token
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 def hash_password(password: str) -> str:
     """Hash the password securely using argon2id."""
@@ -93,6 +246,33 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against the argon2id hash."""
     return pwd_context.verify(plain_password, hashed_password)
 
+# --- Async Password Helpers ---
+
+# Dedicated pool so a login storm can't starve the default threadpool or the CPU.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2"
+)
+_hash_semaphore = None
+
+def _get_hash_semaphore() -> asyncio.Semaphore:
+    global _hash_semaphore
+    if _hash_semaphore is None:
+        _hash_semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+    return _hash_semaphore
+
+async def _run_hasher(func, *args):
+    async with _get_hash_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+
+async def hash_password_async(password: str) -> str:
+    """Hash the password in the bounded argon2 executor."""
+    return await _run_hasher(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify the password in the bounded argon2 executor."""
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
 # --- CSRF Helpers ---
 
 def generate_csrf_token() -> str:
@@ -100,14 +280,16 @@ def generate_csrf_token() -> str:
     return secrets.token_urlsafe(32)
 
 def set_csrf_token_in_session(request) -> str:
-    """Generate/set CSRF token in session and return it."""
-    token = generate_csrf_token()
-    request.session["csrf_token"] = token
-    return token
+    """Return the signed CSRF token for this session (see core/csrf.py).
+
+    Only the first call in a session writes to it (the nonce); later form
+    renders leave the session untouched.
+    """
+    return csrf_token(request)
 
 def validate_csrf_token(request, submitted_token: str) -> bool:
-    """Check submitted CSRF token against session value."""
-    return request.session.get("csrf_token") == submitted_token
+    """Check a submitted token's signature (in constant time) and age."""
+    return check_token(request.session, submitted_token)
 
 # --- Session Regeneration Helper ---
 
@@ -116,6 +298,10 @@ def regenerate_session(request, user_id=None, extra=None):
     Clears the session, sets new authenticated info (prevents fixation).
     """
     request.session.clear()
+    # Server-side sessions also need a fresh session id
+    cycle_key = getattr(request.session, "cycle_key", None)
+    if cycle_key:
+        cycle_key()
     if user_id is not None:
         request.session["user_id"] = user_id
         request.session["auth_time"] = datetime.now(timezone.utc).isoformat()
@@ -128,22 +314,135 @@ def regenerate_session(request, user_id=None, extra=None):
         f.write(utils_py)
 
     # Create core/decorators.py
-    decorators_py = '''
-from functools import wraps
+    if async_db:
+        fetch_user_py = '''
+async def _fetch_user(user_id):
+    """Load the user on the async session without blocking the event loop."""
+    async with SessionLocal() as db:
+        return await db.get(get_user_model(), user_id)
+'''
+    else:
+        fetch_user_py = '''
+def _load_user(user_id):
+    db = SessionLocal()
+    try:
+        return db.get(get_user_model(), user_id)
+    finally:
+        db.close()
+
+
+async def _fetch_user(user_id):
+    """Run the sync query in the threadpool so the event loop stays free."""
+    return await run_in_threadpool(_load_user, user_id)
+'''
+
+    decorators_py = (
+        '''
+from functools import lru_cache, wraps
+from collections import OrderedDict
+import threading
+import time
 from fastapi import Request
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
 from core.database import SessionLocal
 import importlib
 
 
+@lru_cache(maxsize=None)
 def get_user_model():
-    """Dynamically import the configured AUTH_USER_MODEL (e.g. 'app.models.User')."""
+    """Import the configured AUTH_USER_MODEL (e.g. 'app.models.User') once per process."""
     module_name, class_name = settings.AUTH_USER_MODEL.rsplit(".", 1)
     module = importlib.import_module(module_name)
     return getattr(module, class_name)
 
 
+class UserCache:
+    """
+    Per-process TTL + LRU cache of user rows keyed by user_id.
+
+    Cached rows are detached from their session: only columns loaded by the
+    lookup are available, lazy relationships are not.
+    """
+
+    def __init__(self, ttl: int, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._data[user_id]
+                return None
+            self._data.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user) -> None:
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, user)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# USER_CACHE_TTL = 0 disables caching
+user_cache = (
+    UserCache(settings.USER_CACHE_TTL, settings.USER_CACHE_MAXSIZE)
+    if settings.USER_CACHE_TTL > 0
+    else None
+)
+
+
+def invalidate_user(user_id) -> None:
+    """Drop a cached user row, e.g. after the user is updated or deleted."""
+    if user_cache is not None:
+        user_cache.invalidate(user_id)
+
+
+def clear_user_cache() -> None:
+    """Drop every cached user row in this process."""
+    if user_cache is not None:
+        user_cache.clear()
+
+
+def logout_user(request: Request) -> None:
+    """Clear the session and evict the user from the cache."""
+    user_id = request.session.get("user_id")
+    if user_id is not None:
+        invalidate_user(user_id)
+    request.session.clear()
+
+'''
+        + fetch_user_py
+        + '''
+
+async def get_user(user_id):
+    """Return the user for user_id, served from the cache when enabled."""
+    if user_cache is not None:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+    user = await _fetch_user(user_id)
+    if user is not None and user_cache is not None:
+        user_cache.set(user_id, user)
+    return user
+
+
 def login_required(func):
     """
     Ensures a user is authenticated and attaches `request.state.user`.
@@ -170,15 +469,8 @@ def login_required(func):
                 return RedirectResponse(url=login_url, status_code=303)
             raise RuntimeError("LOGIN_URL not configured in settings.")
 
-        # Load user model dynamically
-        User = get_user_model()
-
-        # Fetch user from DB
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-        finally:
-            db.close()
+        # Fetch user (cache, then DB off the event loop)
+        user = await get_user(user_id)
 
         if not user:
             login_url = getattr(settings, "LOGIN_URL", None)
@@ -194,26 +486,191 @@ def login_required(func):
 
     return wrapper
 
-'''.lstrip()
+'''
+    ).lstrip()
     with open(f"{app_name}/core/decorators.py", "w") as f:
         f.write(decorators_py)
 
-    messages_py = """
+    messages_py = '''
+import secrets
+import time
 from typing import Any, Dict, List, Optional
 from fastapi import Request
 
+from core.config import settings
+
 _STORAGE_KEY = "_messages"
+_SERVER_KEY = "_msgid"
+# Standard levels are stored as their index to keep the encoding small
+LEVELS = ("debug", "info", "success", "warning", "error")
+
+
+def encode(message: Dict[str, Any]) -> list:
+    """{"message": "Saved", "level": "success"} -> [2, "Saved"]"""
+    level = message["level"]
+    item = [LEVELS.index(level) if level in LEVELS else level, message["message"],
+            message.get("tags"), message.get("data")]
+    while item[-1] is None:
+        item.pop()
+    return item
+
+
+def decode(item) -> Dict[str, Any]:
+    if isinstance(item, dict):  # stored before the compact encoding
+        return item
+    level = item[0]
+    message: Dict[str, Any] = {"message": item[1], "level": LEVELS[level] if isinstance(level, int) else level}
+    if len(item) > 2 and item[2]:
+        message["tags"] = item[2]
+    if len(item) > 3 and item[3]:
+        message["data"] = item[3]
+    return message
+
+
+class MessageBuffer:
+    """The request's messages; decoded on first use, written back only if changed."""
+
+    def __init__(self, stored: list, write_through: bool = False):
+        self._stored = stored
+        self._messages: Optional[List[Dict[str, Any]]] = None
+        self.changed = False
+        self.write_through = write_through
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        if self._messages is None:
+            self._messages = [decode(item) for item in self._stored]
+        return self._messages
+
+    def add(self, message: Dict[str, Any]) -> None:
+        self.messages.append(message)
+        self.changed = True
+
+    def pop_all(self) -> List[Dict[str, Any]]:
+        messages = self.messages
+        if messages:
+            self._messages = []
+            self.changed = True
+        return messages
+
+    def encoded(self) -> list:
+        return [encode(message) for message in self.messages]
+
+
+class SessionMessageStorage:
+    """Messages travel in the session (and so in the cookie with SESSION_BACKEND=cookie)."""
+
+    async def load(self, session) -> list:
+        return session.get(_STORAGE_KEY, [])
+
+    async def save(self, session, encoded: list) -> None:
+        _save_to_session(session, encoded)
+
+
+class ServerMessageStorage:
+    """
+    Messages live in a SessionBackend; the session only holds a short id while
+    messages are pending, so cookies stay small and untouched otherwise.
+
+    Messages of abandoned sessions are never popped, so expired entries are
+    purged every `purge_interval` seconds, like ServerSessionMiddleware does.
+    The "memory" backend is per process: use "sql" or a shared backend when
+    serving with several workers.
+    """
+
+    def __init__(self, backend=None, max_age: Optional[int] = None, purge_interval: int = 300):
+        from core.sessions import get_session_backend
+
+        self.backend = backend or get_session_backend(settings.MESSAGE_BACKEND)
+        self.max_age = max_age or settings.SESSION_MAX_AGE
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    async def load(self, session) -> list:
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            await self.backend.purge_expired()
+        message_id = session.get(_SERVER_KEY)
+        if message_id is None:
+            return []
+        entry = await self.backend.load(f"msg:{message_id}")
+        return entry[0]["messages"] if entry else []
+
+    async def save(self, session, encoded: list) -> None:
+        message_id = session.get(_SERVER_KEY)
+        if encoded:
+            if message_id is None:
+                message_id = session[_SERVER_KEY] = secrets.token_urlsafe(16)
+            await self.backend.save(f"msg:{message_id}", {"messages": encoded}, time.time() + self.max_age)
+        elif message_id is not None:
+            await self.backend.delete(f"msg:{message_id}")
+            del session[_SERVER_KEY]
+
+
+def get_message_storage(name: Optional[str] = None):
+    """Build the storage named by settings.MESSAGE_STORAGE ('session' or 'server')."""
+    name = name or settings.MESSAGE_STORAGE
+    if name == "server":
+        return ServerMessageStorage()
+    return SessionMessageStorage()
+
+
+class MessageMiddleware:
+    """
+    Loads the request's messages into request.state and saves them once, right
+    before the response starts, and only when add()/pop_all() changed them.
+
+    Must run inside the session middleware (add it to the app first).
+    """
+
+    def __init__(self, app, storage=None):
+        self.app = app
+        self.storage = storage or get_message_storage()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "session" not in scope:
+            return await self.app(scope, receive, send)
+        session = scope["session"]
+        buffer = MessageBuffer(await self.storage.load(session))
+        scope.setdefault("state", {})["flash_messages"] = buffer
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and buffer.changed:
+                await self.storage.save(session, buffer.encoded())
+                buffer.changed = False
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _save_to_session(session, encoded: list) -> None:
+    if encoded:
+        session[_STORAGE_KEY] = encoded
+    elif _STORAGE_KEY in session:
+        del session[_STORAGE_KEY]
+
+
+def _buffer(request: Request) -> MessageBuffer:
+    buffer = getattr(request.state, "flash_messages", None)
+    if buffer is None:
+        # MessageMiddleware isn't installed: write changes straight to the session
+        buffer = MessageBuffer(request.session.get(_STORAGE_KEY, []), write_through=True)
+        request.state.flash_messages = buffer
+    return buffer
+
 
 def add(request: Request, message: str, level: str = "info",
         tags: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> None:
-    queue: List[Dict[str, Any]] = request.session.get(_STORAGE_KEY, [])
     item: Dict[str, Any] = {"message": message, "level": level}
     if tags:
         item["tags"] = tags
     if data:
         item["data"] = data
-    queue.append(item)
-    request.session[_STORAGE_KEY] = queue
+    buffer = _buffer(request)
+    buffer.add(item)
+    if buffer.write_through:
+        _save_to_session(request.session, buffer.encoded())
 
 def success(request: Request, message: str, tags: Optional[str] = None, data: Optional[Dict[str, Any]] = None) -> None:
     add(request, message, "success", tags, data)
@@ -228,59 +685,2511 @@ def error(request: Request, message: str, tags: Optional[str] = None, data: Opti
     add(request, message, "error", tags, data)
 
 def pop_all(request: Request) -> List[Dict[str, Any]]:
-    msgs: List[Dict[str, Any]] = request.session.get(_STORAGE_KEY, [])
-    if msgs:
-        request.session[_STORAGE_KEY] = []
+    buffer = _buffer(request)
+    msgs = buffer.pop_all()
+    if msgs and buffer.write_through:
+        _save_to_session(request.session, [])
     return msgs
-
-""".lstrip()
+'''.lstrip()
     with open(f"{app_name}/core/messages.py", "w") as f:
         f.write(messages_py)
 
-    admin_loader_py = """
-# core/admin_loader.py
+    # Create core/sessions.py
+    sessions_py = '''
+# core/sessions.py
 import importlib
-import pkgutil
-from sqladmin import Admin
-from sqladmin import ModelView
+import json
+import secrets
+import time
+from typing import Any, Dict, Optional, Tuple
 
+from sqlalchemy import Column, Float, String, Table, Text, delete, select, update
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import HTTPConnection
 
-def register_admin_views(admin: Admin, module_names: list[str]):
-    
-    # Automatically imports all admin modules and registers all ModelView subclasses.
-    # Supports both 'app' and 'app.admin' module names.
+from core.config import settings
+from core.database import Base
+
+
+class Session(dict):
+    """Session dict that records whether it was changed during the request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.modified = False
+        self.rotated = False
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.modified = True
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.modified = True
+
+    def clear(self):
+        if self:
+            self.modified = True
+        super().clear()
+
+    def pop(self, key, *default):
+        if key in self:
+            self.modified = True
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.modified = True
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.modified = True
+
+    def cycle_key(self):
+        """Issue a new session id on the way out (e.g. after login)."""
+        self.rotated = True
+        self.modified = True
+
+
+class SentSession(dict):
+    """request.session once the response has started: reads work, writes raise."""
+
+    def _refuse(self, *args, **kwargs):
+        raise RuntimeError(
+            "The session was changed after the response started, so the change "
+            "can't be saved. Change it before returning the response (for "
+            "stream_template, before calling it)."
+        )
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _refuse
+
+    def cycle_key(self):
+        self._refuse()
+
+
+def guard_session(app):
+    """
+    Wrap the app inside a session middleware so that session writes made after
+    the session was saved (e.g. while a StreamingResponse renders) fail loudly
+    instead of being dropped.
+    """
+
+    async def guarded(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.start" and "session" in scope:
+                scope["session"] = SentSession(scope["session"])
+
+        await app(scope, receive, send_wrapper)
+
+    return guarded
+
+
+class CookieSessionMiddleware(SessionMiddleware):
+    """Starlette's signed-cookie SessionMiddleware, with late writes guarded."""
+
+    def __init__(self, app, *args, **kwargs):
+        super().__init__(guard_session(app), *args, **kwargs)
+
+
+class SessionBackend:
+    """
+    Interface for server-side session stores.
+
+    Subclass it to plug in an external store (Redis, memcached, ...) and point
+    settings.SESSION_BACKEND at the dotted path of the subclass.
+    """
+
+    async def load(self, session_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (data, expires_at) or None if missing or expired."""
+        raise NotImplementedError
+
+    async def save(self, session_id: str, data: Dict[str, Any], expires_at: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    async def purge_expired(self) -> None:
+        """Remove every expired session in one go."""
+        raise NotImplementedError
+
+
+class MemorySessionBackend(SessionBackend):
+    """In-process store. Sessions are not shared between workers."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
+    async def load(self, session_id):
+        entry = self._data.get(session_id)
+        if entry is None or entry[1] < time.time():
+            return None
+        return dict(entry[0]), entry[1]
+
+    async def save(self, session_id, data, expires_at):
+        self._data[session_id] = (dict(data), expires_at)
+
+    async def delete(self, session_id):
+        self._data.pop(session_id, None)
+
+    async def purge_expired(self):
+        now = time.time()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+
+
+sessions_table = Table(
+    "archon_sessions",
+    Base.metadata,
+    Column("id", String(64), primary_key=True),
+    Column("data", Text, nullable=False),
+    Column("expires_at", Float, nullable=False, index=True),
+)
+
+
+class SQLSessionBackend(SessionBackend):
+    """Stores sessions in the `archon_sessions` table through core.database.engine."""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from core.database import engine
+        self.engine = engine
+
+    async def _run(self, fn):
+        # AsyncEngine (--async-db) exposes sync_engine; avoids importing asyncio support
+        if hasattr(self.engine, "sync_engine"):
+            async with self.engine.begin() as conn:
+                return await conn.run_sync(fn)
+        return await run_in_threadpool(self._run_sync, fn)
+
+    def _run_sync(self, fn):
+        with self.engine.begin() as conn:
+            return fn(conn)
+
+    async def load(self, session_id):
+        def _load(conn):
+            return conn.execute(
+                select(sessions_table.c.data, sessions_table.c.expires_at).where(
+                    sessions_table.c.id == session_id,
+                    sessions_table.c.expires_at >= time.time(),
+                )
+            ).first()
+
+        row = await self._run(_load)
+        if row is None:
+            return None
+        return json.loads(row.data), row.expires_at
+
+    async def save(self, session_id, data, expires_at):
+        payload = json.dumps(data, separators=(",", ":"))
+
+        def _save(conn):
+            result = conn.execute(
+                update(sessions_table)
+                .where(sessions_table.c.id == session_id)
+                .values(data=payload, expires_at=expires_at)
+            )
+            if result.rowcount == 0:
+                conn.execute(
+                    sessions_table.insert().values(
+                        id=session_id, data=payload, expires_at=expires_at
+                    )
+                )
+
+        await self._run(_save)
+
+    async def delete(self, session_id):
+        await self._run(
+            lambda conn: conn.execute(
+                delete(sessions_table).where(sessions_table.c.id == session_id)
+            )
+        )
+
+    async def purge_expired(self):
+        now = time.time()
+        await self._run(
+            lambda conn: conn.execute(
+                delete(sessions_table).where(sessions_table.c.expires_at < now)
+            )
+        )
+
+
+def get_session_backend(name: Optional[str] = None) -> SessionBackend:
+    """Build the backend named by settings.SESSION_BACKEND ('memory', 'sql' or a dotted path)."""
+    name = name or settings.SESSION_BACKEND
+    if name == "memory":
+        return MemorySessionBackend()
+    if name == "sql":
+        return SQLSessionBackend()
+    module_name, class_name = name.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)()
 
-    for name in module_names:
-        # Try to handle both 'app' and 'app.admin'
-        try:
-            package = importlib.import_module(name)
-        except ModuleNotFoundError:
-            # maybe it was just the app name (e.g. 'users')
-            try:
-                package = importlib.import_module(f"{name}.admin")
-            except ModuleNotFoundError:
-                continue
 
-        # If the module itself is the admin module, skip iterating
-        if not hasattr(package, "__path__"):
-            module = package
+class ServerSessionMiddleware:
+    """
+    Drop-in replacement for Starlette's SessionMiddleware.
+
+    The cookie only carries an opaque session id. Data is written to the
+    backend only when the session changed (or is close to expiring), and
+    expired entries are purged in bulk every `purge_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend: SessionBackend,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        purge_interval: int = 300,
+    ):
+        self.app = guard_session(app)
+        self.backend = backend
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.session_cookie)
+        loaded = await self.backend.load(session_id) if session_id else None
+        if loaded is None:
+            # Never adopt an unknown id chosen by the client
+            session_id, data, expires_at = None, {}, 0.0
         else:
-            # find its admin.py submodule
-            try:
-                module = importlib.import_module(f"{name}.admin")
-            except ModuleNotFoundError:
-                continue
+            data, expires_at = loaded
+        session = Session(data)
+        scope["session"] = session
 
-        # Now scan for subclasses of ModelView
-        for attr_name in dir(module):
-            attr = getattr(module, attr_name)
-            if (
-                isinstance(attr, type)
-                and issubclass(attr, ModelView)
-                and attr is not ModelView
-            ):
-                admin.add_view(attr)
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            await self.backend.purge_expired()
 
-""".lstrip()
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                await self._commit(session, session_id, expires_at, message)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(self, session, session_id, expires_at, message):
+        headers = MutableHeaders(scope=message)
+        if session_id and session.rotated:
+            await self.backend.delete(session_id)
+            session_id = None
+
+        if not session:
+            if session_id and session.modified:
+                await self.backend.delete(session_id)
+                headers.append("Set-Cookie", self._cookie("null", expired=True))
+            elif session.rotated:
+                headers.append("Set-Cookie", self._cookie("null", expired=True))
+            return
+
+        now = time.time()
+        # Refresh untouched sessions only once half of their lifetime has passed
+        if session_id and not session.modified and expires_at - now > self.max_age / 2:
+            return
+
+        session_id = session_id or secrets.token_urlsafe(32)
+        await self.backend.save(session_id, dict(session), now + self.max_age)
+        headers.append("Set-Cookie", self._cookie(session_id))
+
+    def _cookie(self, value: str, expired: bool = False) -> str:
+        if expired:
+            return (
+                f"{self.session_cookie}={value}; path={self.path}; "
+                f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}"
+            )
+        return (
+            f"{self.session_cookie}={value}; path={self.path}; "
+            f"Max-Age={self.max_age}; {self.security_flags}"
+        )
+'''.lstrip()
+    with open(f"{app_name}/core/sessions.py", "w") as f:
+        f.write(sessions_py)
+
+    # Create core/render_cache.py
+    render_cache_py = '''
+# core/render_cache.py
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from core.config import settings
+
+
+class RenderCache:
+    """LRU + TTL store for rendered pages and fragments, with tag-based invalidation."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            tags = tuple(tags)
+            self._data[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Drop every entry stored with any of `tags`."""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+render_cache = RenderCache(settings.RENDER_CACHE_MAXSIZE)
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Invalidate cached pages and fragments, e.g. invalidate_tags("posts") after saving a post."""
+    render_cache.invalidate_tags(*tags)
+
+
+def _vary_key(request: Request, vary: Iterable[str]) -> str:
+    parts = []
+    for name in vary:
+        if name == "path":
+            parts.append(request.url.path)
+        elif name == "query":
+            parts.append("&".join(sorted(request.url.query.split("&"))))
+        elif name == "user":
+            session = request.scope.get("session") or {}
+            parts.append(str(session.get("user_id", "")))
+        elif name == "locale":
+            parts.append(request.headers.get("accept-language", "").split(",")[0].strip())
+        else:
+            raise ValueError(f"Unknown vary key: {name}")
+    return "|".join(parts)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip() in (etag, "W/" + etag) for tag in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# Recomputed for every replay, or never shared between visitors
+_UNCACHED_HEADERS = (b"content-length", b"etag", b"set-cookie")
+
+
+def cache_page(
+    ttl: int = 60,
+    vary: Tuple[str, ...] = ("path", "query"),
+    tags: Iterable[str] = (),
+):
+    """
+    Cache the rendered body of a route handler.
+
+    - `vary` picks the key parts: "path", "query", "user" (session user_id), "locale".
+    - Responses get a strong ETag; a matching If-None-Match returns 304 without rendering.
+    - Only 200 responses with a body are cached (not StreamingResponse); their
+      headers are replayed, except Set-Cookie.
+    - Pages that embed per-session data (CSRF tokens, flash messages) must vary by "user" or not be cached.
+    - The handler must take a `request: Request` parameter.
+    """
+    tags = tuple(tags)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        if not any(
+            param.name == "request" or param.annotation is Request
+            for param in inspect.signature(func).parameters.values()
+        ):
+            raise TypeError(f"@cache_page needs a `request: Request` parameter on {name}")
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Optional[Request] = kwargs.get("request") or next(
+                (arg for arg in args if isinstance(arg, Request)), None
+            )
+            if request is None or request.method not in ("GET", "HEAD"):
+                return await func(*args, **kwargs)
+
+            key = f"page:{name}:{_vary_key(request, vary)}"
+            cached = render_cache.get(key)
+            if cached is None:
+                response = await func(*args, **kwargs)
+                body = getattr(response, "body", None)
+                if response.status_code != 200 or body is None:
+                    return response
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                headers = [
+                    (header, value)
+                    for header, value in response.raw_headers
+                    if header not in _UNCACHED_HEADERS
+                ]
+                render_cache.set(key, (body, headers, etag), ttl, tags)
+                # This visitor still gets the handler's own response, cookies included
+                response.headers["etag"] = etag
+                return _not_modified(etag) if _etag_matches(request, etag) else response
+
+            body, headers, etag = cached
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+            response = Response(body, headers={"ETag": etag})
+            response.raw_headers.extend(headers)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache "sidebar", user.id, ttl=300, tags=["nav"] %}...{% endcache %}
+
+    The key is the template name and line of the tag plus the positional
+    arguments; `ttl` (seconds) and `tags` are optional.
+    """
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args, kwargs = [], []
+        while parser.stream.current.type != "block_end":
+            if args or kwargs:
+                parser.stream.expect("comma")
+            if parser.stream.current.type == "name" and parser.stream.look().type == "assign":
+                key = parser.stream.current.value
+                parser.stream.skip(2)
+                kwargs.append(nodes.Keyword(key, parser.parse_expression()))
+            else:
+                args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        # Keyless tags on one line still need distinct keys
+        index = getattr(parser, "_cache_tags", 0)
+        parser._cache_tags = index + 1
+        origin = nodes.Const(f"{parser.name}:{lineno}:{index}")
+        call = self.call_method("_cache_support", [origin, nodes.List(args)], kwargs)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cache_support(self, origin, parts, ttl=300, tags=(), *, caller):
+        key = f"fragment:{origin}:" + ":".join(str(part) for part in parts)
+        cached = render_cache.get(key)
+        if cached is not None:
+            return cached
+        rendered = caller()
+        if inspect.isawaitable(rendered):
+            return self._store_async(key, rendered, ttl, tags)
+        render_cache.set(key, rendered, ttl, tags)
+        return rendered
+
+    async def _store_async(self, key, rendered, ttl, tags):
+        rendered = await rendered
+        render_cache.set(key, rendered, ttl, tags)
+        return rendered
+'''.lstrip()
+    with open(f"{app_name}/core/render_cache.py", "w") as f:
+        f.write(render_cache_py)
+
+    # Create core/staticfiles.py
+    staticfiles_py = '''
+# core/staticfiles.py
+import json
+import mimetypes
+import os
+import re
+import stat
+from email.utils import parsedate
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from core.config import settings
+from core.middleware import choose_encoding
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+HASHED_NAME = re.compile(r"[.][0-9a-f]{12}[.][^.]+$")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_manifest() -> dict:
+    """Read the manifest written by `archonkit collectstatic` (empty in DEBUG or if missing)."""
+    if settings.debug:
+        return {}
+    try:
+        with open(os.path.join(settings.STATIC_ROOT, "staticfiles.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+manifest = load_manifest()
+
+
+def static(path: str) -> str:
+    """URL for a static file, e.g. static('users/app.css') -> '/static/users/app.<hash>.css'."""
+    return settings.STATIC_URL + manifest.get(path, path)
+
+
+def _route_path(scope) -> str:
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path):]
+    return path
+
+
+def _is_not_modified(response_headers, request_headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        etag = response_headers["etag"]
+        return any(tag.strip() in (etag, "W/" + etag) for tag in if_none_match.split(","))
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return bool(if_modified_since and last_modified and if_modified_since >= last_modified)
+
+
+class StaticDispatcher:
+    """
+    One ASGI app for every feature's static files, mounted once at /static.
+
+    Features register their directory under a prefix (users -> users/static),
+    so /static/users/app.css is resolved with a single dict lookup instead of
+    walking one Mount per feature. File metadata (stat, media type, encoded
+    variants) is cached when `cache_metadata` is set.
+
+    With `collected_root` (the collectstatic output) every path is served from
+    that tree instead, using .br/.gz variants the client accepts and
+    immutable caching for hashed names. FileResponse takes care of Range
+    requests.
+    """
+
+    def __init__(self, collected_root: str = None, cache_metadata: bool = True):
+        self.roots = {}
+        self.collected_root = os.path.realpath(collected_root) if collected_root else None
+        self.cache_metadata = cache_metadata
+        self._metadata = {}
+
+    def register(self, prefix: str, directory: str) -> None:
+        """Serve `directory` under /static/<prefix>/."""
+        self.roots[prefix] = os.path.realpath(directory)
+
+    def resolve(self, path: str):
+        """Map 'users/app.css' to an absolute path, refusing anything outside the root."""
+        if self.collected_root:
+            root, relative = self.collected_root, path
+        else:
+            prefix, _, relative = path.partition("/")
+            root = self.roots.get(prefix)
+            if root is None:
+                return None
+        full_path = os.path.realpath(os.path.join(root, relative))
+        if not full_path.startswith(root + os.sep):
+            return None
+        return full_path
+
+    def lookup(self, path: str):
+        """Return (full_path, stat_result, media_type, variants, hashed) or None."""
+        metadata = self._metadata.get(path)
+        if metadata is not None:
+            return metadata
+        full_path = self.resolve(path)
+        if full_path is None:
+            return None
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        variants = {}
+        if self.collected_root:
+            for encoding, suffix in ENCODINGS:
+                try:
+                    variants[encoding] = (full_path + suffix, os.stat(full_path + suffix))
+                except OSError:
+                    pass
+        metadata = (
+            full_path,
+            stat_result,
+            mimetypes.guess_type(full_path)[0] or "text/plain",
+            variants,
+            bool(HASHED_NAME.search(os.path.basename(full_path))),
+        )
+        if self.cache_metadata:
+            self._metadata[path] = metadata
+        return metadata
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405)
+            await response(scope, receive, send)
+            return
+
+        metadata = self.lookup(_route_path(scope).lstrip("/"))
+        if metadata is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        full_path, stat_result, media_type, variants, hashed = metadata
+        request_headers = Headers(scope=scope)
+        # Ranges are always served from the identity representation
+        encoding = None
+        if variants and "range" not in request_headers:
+            encoding = choose_encoding(
+                request_headers.get("accept-encoding", ""),
+                [name for name, _ in ENCODINGS if name in variants],
+            )
+        if encoding:
+            full_path, stat_result = variants[encoding]
+
+        response = FileResponse(full_path, stat_result=stat_result, media_type=media_type)
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if variants:
+            response.headers["vary"] = "Accept-Encoding"
+        if hashed:
+            response.headers["cache-control"] = IMMUTABLE
+        if _is_not_modified(response.headers, request_headers):
+            response = NotModifiedResponse(response.headers)
+        await response(scope, receive, send)
+
+
+static_app = StaticDispatcher(
+    collected_root=settings.STATIC_ROOT if manifest else None,
+    cache_metadata=not settings.debug,
+)
+'''.lstrip()
+    with open(f"{app_name}/core/staticfiles.py", "w") as f:
+        f.write(staticfiles_py)
+
+    # Create core/registry.py
+    registry_py = '''
+# core/registry.py
+import importlib
+import logging
+import os
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from core.config import settings
+from core.staticfiles import static_app
+
+logger = logging.getLogger("archonkit.registry")
+
+# Features wired into the app; `archonkit feature <name>` appends to this list.
+# Each feature's router is expected under the "/<name>" prefix.
+FEATURES = [
+]
+
+# Seconds spent importing and including each feature's router
+load_times = {}
+
+
+def load_feature(app, name: str) -> None:
+    """Import `<name>.routes` and include its router (once)."""
+    if name in load_times:
+        return
+    start = time.perf_counter()
+    module = importlib.import_module(f"{name}.routes")
+    app.include_router(module.router)
+    app.openapi_schema = None
+    load_times[name] = time.perf_counter() - start
+
+
+def report() -> str:
+    """Per-feature import times, slowest first."""
+    rows = sorted(load_times.items(), key=lambda item: item[1], reverse=True)
+    lines = [f"  {name:<24} {seconds * 1000:8.1f} ms" for name, seconds in rows]
+    total = sum(load_times.values()) * 1000
+    return "\\n".join(["Feature startup times:", *lines, f"  {'total':<24} {total:8.1f} ms"])
+
+
+class LazyFeatureMiddleware:
+    """
+    Imports a feature's router on the first request under its prefix. The
+    import runs in the threadpool so it doesn't stall the event loop.
+    """
+
+    def __init__(self, app, pending: dict):
+        self.app = app
+        self.pending = dict(pending)
+
+    async def __call__(self, scope, receive, send):
+        if self.pending and scope["type"] in ("http", "websocket"):
+            prefix = "/" + scope["path"].lstrip("/").split("/", 1)[0]
+            name = self.pending.get(prefix)
+            if name is not None:
+                await run_in_threadpool(importlib.import_module, f"{name}.routes")
+                load_feature(scope["app"], name)
+                self.pending.pop(prefix, None)
+        await self.app(scope, receive, send)
+
+
+def install(app, mode: str = None) -> None:
+    """
+    Wire every feature in FEATURES into `app`.
+
+    - "lazy": routers are imported on the first request to their prefix, so
+      workers boot without importing feature models, forms and templates.
+      Until then url_for and the OpenAPI schema miss those routes.
+    - "eager": everything is imported now (warm workers, url_for works for
+      every route from the start, and `archonkit serve --preload` shares the
+      imported code between workers) and the per-feature times are logged.
+
+    Without a mode or FEATURE_LOADING, DEBUG loads lazily and production eagerly.
+    """
+    mode = mode or settings.FEATURE_LOADING or ("lazy" if settings.debug else "eager")
+    for name in FEATURES:
+        static_dir = os.path.join(name, "static")
+        if os.path.isdir(static_dir):
+            static_app.register(name, static_dir)
+
+    if mode == "eager":
+        for name in FEATURES:
+            load_feature(app, name)
+        logger.info(report())
+    else:
+        app.add_middleware(
+            LazyFeatureMiddleware, pending={f"/{name}": name for name in FEATURES}
+        )
+'''.lstrip()
+    with open(f"{app_name}/core/registry.py", "w") as f:
+        f.write(registry_py)
+
+    # Create core/migrations.py
+    migrations_py = '''
+# core/migrations.py
+import importlib
+import logging
+import time
+
+from sqlalchemy import Table, event, text
+
+from core.database import Base
+
+logger = logging.getLogger("archonkit.migrations")
+
+
+def feature_tables(feature: str) -> set:
+    """Names of the tables defined in `<feature>.models`."""
+    module = importlib.import_module(f"{feature}.models")
+    tables = {
+        mapper.local_table.name
+        for mapper in Base.registry.mappers
+        if mapper.class_.__module__ == module.__name__
+    }
+    tables.update(value.name for value in vars(module).values() if isinstance(value, Table))
+    return tables
+
+
+def alembic_options(config, connection=None) -> dict:
+    """
+    Extra context.configure() arguments used by the archonkit migration commands.
+
+    - `makemigrations --feature users` limits reflection and comparison to the
+      tables of users/models.py (include_name skips reflecting every other table),
+      and records the reflect/compare timings it prints.
+    - `migrate` / `rollback` record how long each revision took to apply.
+
+    Wire it into alembic/env.py (both the online and offline configure calls):
+
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            **alembic_options(config, connection),
+        )
+    """
+    options = {}
+    feature = config.attributes.get("archonkit_feature")
+    timings = config.attributes.get("archonkit_timings")
+    revisions = config.attributes.get("archonkit_revisions")
+
+    if feature:
+        tables = feature_tables(feature)
+
+        def include_name(name, type_, parent_names):
+            return type_ != "table" or name in tables
+
+        def include_object(obj, name, type_, reflected, compare_to):
+            if type_ == "table":
+                return name in tables
+            table = getattr(obj, "table", None)
+            return table is None or table.name in tables
+
+        options.update(include_name=include_name, include_object=include_object)
+
+    if timings is not None:
+        timings["configured"] = time.perf_counter()
+        timings["reflect"] = 0.0
+
+        if connection is not None:
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                conn.info["archonkit_query_start"] = time.perf_counter()
+
+            def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                started = conn.info.pop("archonkit_query_start", None)
+                if started is not None:
+                    timings["reflect"] += time.perf_counter() - started
+
+            event.listen(connection, "before_cursor_execute", before_cursor_execute)
+            event.listen(connection, "after_cursor_execute", after_cursor_execute)
+
+        def process_revision_directives(context, revision, directives):
+            # Autogenerate has finished comparing; rendering starts now
+            timings["compared"] = time.perf_counter()
+
+        options["process_revision_directives"] = process_revision_directives
+
+    if revisions is not None:
+        last = [time.perf_counter()]
+
+        def on_version_apply(ctx, step, heads, run_args):
+            now = time.perf_counter()
+            script = step.up_revision
+            revisions.append(
+                {
+                    "revision": step.up_revision_id,
+                    "from": ",".join(step.source_revision_ids) or "base",
+                    "to": ",".join(step.destination_revision_ids) or "base",
+                    "direction": "upgrade" if step.is_upgrade else "downgrade",
+                    "message": script.doc if script is not None else "",
+                    "seconds": round(now - last[0], 4),
+                }
+            )
+            last[0] = now
+
+        options["on_version_apply"] = on_version_apply
+
+    return options
+
+
+def backfill(table, set_clause, *, where=None, params=None, key="id", batch_size=10_000, sleep=0.0):
+    """
+    Run `UPDATE table SET set_clause` in key ranges, committing every batch.
+
+    Use inside a migration's upgrade()/downgrade() for data migrations on big
+    tables, so no single transaction holds locks over millions of rows:
+
+        backfill("users", "is_active = :active", where="is_active IS NULL",
+                 params={"active": True}, batch_size=5_000, sleep=0.05)
+
+    Each batch is `... WHERE key BETWEEN :lo AND :hi [AND (where)]`; progress is
+    logged per batch and `sleep` seconds are spent between batches to leave
+    room for replication and other writers. In offline (--sql) mode a single
+    UPDATE is emitted instead.
+    """
+    from alembic import op
+
+    params = params or {}
+    context = op.get_context()
+    if context.as_sql:
+        statement = f"UPDATE {table} SET {set_clause}" + (f" WHERE {where}" if where else "")
+        op.execute(text(statement).bindparams(**params))
+        return 0
+
+    bind = op.get_bind()
+    low, high = bind.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table}")).one()
+    if low is None:
+        return 0
+
+    # alembic.ini's fileConfig() disables loggers it doesn't list
+    logger.disabled = False
+    if logger.level == logging.NOTSET:
+        logger.setLevel(logging.INFO)
+
+    condition = f" AND ({where})" if where else ""
+    statement = text(f"UPDATE {table} SET {set_clause} WHERE {key} BETWEEN :lo AND :hi{condition}")
+    span = high - low + 1
+    updated = 0
+    started = time.perf_counter()
+    # Commit the migration's transaction so far and run each batch on its own
+    with context.autocommit_block():
+        for lo in range(low, high + 1, batch_size):
+            hi = min(lo + batch_size - 1, high)
+            updated += bind.execute(statement, {**params, "lo": lo, "hi": hi}).rowcount
+            done = hi - low + 1
+            logger.info(
+                "%s: %6.1f%% (%d rows updated, %.1fs)",
+                table, done / span * 100, updated, time.perf_counter() - started,
+            )
+            if sleep and hi < high:
+                time.sleep(sleep)
+    return updated
+'''.lstrip()
+    with open(f"{app_name}/core/migrations.py", "w") as f:
+        f.write(migrations_py)
+
+    # Create core/metrics.py
+    metrics_py = '''
+# core/metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from core.config import settings
+
+# Seconds; Prometheus' client defaults
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\\\", "\\\\\\\\").replace('"', '\\\\"').replace("\\n", "\\\\n")
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket and summed up on export."""
+
+    __slots__ = ("labels", "buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets, labels=""):
+        self.labels = labels
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def expose(self, name):
+        sep = "," if self.labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{self.labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{self.labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{self.labels}}}" if self.labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RouteMetrics:
+    """Latency histogram and per-status-class response counts for one route."""
+
+    __slots__ = ("latency", "statuses")
+
+    def __init__(self, method, path):
+        self.latency = Histogram(LATENCY_BUCKETS, f'method="{method}",route="{_escape(path)}"')
+        self.statuses = [0] * 6  # index = status // 100
+
+
+class RequestStats:
+    """SQL work done while handling the current request."""
+
+    __slots__ = ("queries", "query_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+
+
+_current = ContextVar("archon_request_stats", default=None)
+_sql_lock = threading.Lock()
+
+routes = {}
+templates = {}
+in_flight = 0
+sql_duration = Histogram(LATENCY_BUCKETS)
+sql_per_request = Histogram(QUERY_COUNT_BUCKETS)
+sql_time_per_request = Histogram(LATENCY_BUCKETS)
+
+
+def _route_metrics(method, path):
+    key = (method, path)
+    metrics = routes.get(key)
+    if metrics is None:
+        metrics = routes[key] = RouteMetrics(method, path)
+    return metrics
+
+
+def _route_path(scope):
+    route = scope.get("route")
+    if route is not None:
+        return scope.get("root_path", "") + route.path
+    # Unmatched paths share one series so scanners can't blow up cardinality
+    return "<unmatched>"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = [
+        "# TYPE archon_http_requests_in_flight gauge",
+        f"archon_http_requests_in_flight {in_flight}",
+        "# TYPE archon_http_request_duration_seconds histogram",
+    ]
+    for metrics in list(routes.values()):
+        lines.extend(metrics.latency.expose("archon_http_request_duration_seconds"))
+    lines.append("# TYPE archon_http_responses_total counter")
+    for metrics in list(routes.values()):
+        for status_class, count in enumerate(metrics.statuses):
+            if count:
+                lines.append(
+                    f'archon_http_responses_total{{{metrics.latency.labels},status="{status_class}xx"}} {count}'
+                )
+    lines.append("# TYPE archon_template_render_seconds histogram")
+    for histogram in list(templates.values()):
+        lines.extend(histogram.expose("archon_template_render_seconds"))
+    lines.append("# TYPE archon_sql_query_duration_seconds histogram")
+    lines.extend(sql_duration.expose("archon_sql_query_duration_seconds"))
+    lines.append("# TYPE archon_sql_queries_per_request histogram")
+    lines.extend(sql_per_request.expose("archon_sql_queries_per_request"))
+    lines.append("# TYPE archon_sql_time_per_request_seconds histogram")
+    lines.extend(sql_time_per_request.expose("archon_sql_time_per_request_seconds"))
+    return "\\n".join(lines) + "\\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request and serving `path`.
+
+    Routes are labelled by their template ("/users/{id}"), not the raw URL.
+    """
+
+    def __init__(self, app, path="/metrics"):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        global in_flight
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if scope["path"] == self.path:
+            body = render().encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight -= 1
+            _current.reset(token)
+            metrics = _route_metrics(scope["method"], _route_path(scope))
+            metrics.latency.observe(elapsed)
+            metrics.statuses[min(status // 100, 5)] += 1
+            sql_per_request.observe(stats.queries)
+            sql_time_per_request.observe(stats.query_time)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._archon_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._archon_query_start
+    # Sync engines run queries in the threadpool
+    with _sql_lock:
+        sql_duration.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+
+
+def instrument_engine(engine):
+    """Count and time every statement run through `engine`."""
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _template_histogram(name):
+    histogram = templates.get(name)
+    if histogram is None:
+        histogram = templates[name] = Histogram(LATENCY_BUCKETS, f'template="{_escape(str(name))}"')
+    return histogram
+
+
+def instrument_templates(*environments):
+    """
+    Time Template.render()/render_async()/generate_async() for every template
+    of `environments`. Streamed templates (stream_template) are timed while
+    they render, not while the client receives the chunks.
+    """
+    for environment in environments:
+        base = environment.template_class
+
+        class TimedTemplate(base):
+            def render(self, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return super().render(*args, **kwargs)
+                finally:
+                    _template_histogram(self.name).observe(time.perf_counter() - start)
+
+            async def render_async(self, *args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await super().render_async(*args, **kwargs)
+                finally:
+                    _template_histogram(self.name).observe(time.perf_counter() - start)
+
+            async def generate_async(self, *args, **kwargs):
+                elapsed = 0.0
+                start = time.perf_counter()
+                try:
+                    async for chunk in super().generate_async(*args, **kwargs):
+                        elapsed += time.perf_counter() - start
+                        yield chunk
+                        start = time.perf_counter()
+                    elapsed += time.perf_counter() - start
+                finally:
+                    _template_histogram(self.name).observe(elapsed)
+
+        environment.template_class = TimedTemplate
+        # Templates loaded before instrumenting were built from the old class
+        if environment.cache is not None:
+            environment.cache.clear()
+
+
+def install(app, path=None):
+    """Instrument the shared engine and templates and serve metrics on `path`."""
+    from core.database import engine
+    from core.templates import async_env, env
+
+    instrument_engine(engine)
+    instrument_templates(env, async_env)
+    app.add_middleware(MetricsMiddleware, path=path or settings.METRICS_PATH)
+'''.lstrip()
+    with open(f"{app_name}/core/metrics.py", "w") as f:
+        f.write(metrics_py)
+
+    # Create core/nplusone.py
+    nplusone_py = '''
+# core/nplusone.py
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from core.config import settings
+
+logger = logging.getLogger("archonkit.nplusone")
+
+
+class NPlusOneError(AssertionError):
+    """Raised for repeated statements when NPLUSONE_RAISE is on (e.g. in tests)."""
+
+
+class QueryLog:
+    """How often each statement ran while handling one request."""
+
+    __slots__ = ("counts", "templates", "template")
+
+    def __init__(self):
+        self.counts = {}
+        self.templates = {}
+        self.template = None  # template being rendered right now, if any
+
+    def record(self, statement):
+        count = self.counts.get(statement, 0) + 1
+        self.counts[statement] = count
+        if count == 1:
+            self.templates[statement] = self.template
+
+    def repeated(self, threshold):
+        """[(statement, count, template)] for statements run `threshold`+ times."""
+        return [
+            (statement, count, self.templates.get(statement))
+            for statement, count in self.counts.items()
+            if count >= threshold
+        ]
+
+
+_current = ContextVar("archon_query_log", default=None)
+
+
+def _shorten(statement, limit=200):
+    statement = re.sub(r"\\s+", " ", statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def check(label, log, threshold=None, raise_error=None):
+    """Warn about (or raise for) every statement `log` saw `threshold`+ times."""
+    threshold = threshold or settings.NPLUSONE_THRESHOLD
+    raise_error = settings.NPLUSONE_RAISE if raise_error is None else raise_error
+    problems = log.repeated(threshold)
+    if not problems:
+        return
+    lines = [f"Possible N+1 queries in {label}:"]
+    for statement, count, template in problems:
+        where = f" (while rendering {template})" if template else ""
+        lines.append(f"  {count}x {_shorten(statement)}{where}")
+    message = "\\n".join(lines)
+    if raise_error:
+        raise NPlusOneError(message)
+    logger.warning(message)
+
+
+@contextmanager
+def watch(label="block", threshold=None, raise_error=None):
+    """
+    Check the statements run inside the block, e.g. in a test:
+
+        with nplusone.watch("user list", threshold=3, raise_error=True):
+            client.get("/users/")
+    """
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+    check(label, log, threshold, raise_error)
+
+
+class NPlusOneMiddleware:
+    """
+    Pure ASGI middleware checking each HTTP request for repeated statements.
+
+    Inside a watch() block (e.g. a test calling the app) the block's log is
+    used instead, so the block's threshold and raise_error apply.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _current.get() is not None:
+            return await self.app(scope, receive, send)
+        log = QueryLog()
+        token = _current.set(log)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+        route = scope.get("route")
+        path = scope.get("root_path", "") + route.path if route is not None else scope["path"]
+        check(f"{scope['method']} {path}", log)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _current.get()
+    if log is not None:
+        log.record(statement)
+
+
+def instrument_engine(engine):
+    """Record every statement run through `engine` in the current QueryLog."""
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def _rendering(name):
+    log = _current.get()
+    if log is None:
+        yield
+        return
+    previous, log.template = log.template, name
+    try:
+        yield
+    finally:
+        log.template = previous
+
+
+def instrument_templates(*environments):
+    """Attribute queries fired while a template renders (lazy loads) to that template."""
+    for environment in environments:
+        base = environment.template_class
+
+        class TrackedTemplate(base):
+            def render(self, *args, **kwargs):
+                with _rendering(self.name):
+                    return super().render(*args, **kwargs)
+
+            async def render_async(self, *args, **kwargs):
+                with _rendering(self.name):
+                    return await super().render_async(*args, **kwargs)
+
+            async def generate_async(self, *args, **kwargs):
+                with _rendering(self.name):
+                    async for chunk in super().generate_async(*args, **kwargs):
+                        yield chunk
+
+        environment.template_class = TrackedTemplate
+        # Templates loaded before instrumenting were built from the old class
+        if environment.cache is not None:
+            environment.cache.clear()
+
+
+def install(app):
+    """Watch the shared engine and templates for N+1 patterns. Meant for DEBUG only."""
+    from core.database import engine
+    from core.templates import async_env, env
+
+    instrument_engine(engine)
+    instrument_templates(env, async_env)
+    app.add_middleware(NPlusOneMiddleware)
+'''.lstrip()
+    with open(f"{app_name}/core/nplusone.py", "w") as f:
+        f.write(nplusone_py)
+
+    # Create core/csrf.py
+    csrf_py = '''
+# core/csrf.py
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from starlette.responses import PlainTextResponse
+
+from core.config import settings
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE"})
+FORM_FIELD = "csrf_token"
+HEADER = "x-csrf-token"
+_NONCE_KEY = "csrf_nonce"
+# Issue times are rounded down so a page renders the same token for a few
+# minutes, which keeps it cacheable (and its ETag stable)
+_STEP = 300
+
+_key = hashlib.sha256(b"archonkit.csrf:" + (settings.SECRET_KEY or "").encode()).digest()
+
+
+def _signature(nonce: str, issued: int) -> str:
+    digest = hmac.new(_key, f"{nonce}:{issued}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def session_nonce(session) -> str:
+    """The session's CSRF nonce, created (and written to the session) only once."""
+    nonce = session.get(_NONCE_KEY)
+    if nonce is None:
+        nonce = session[_NONCE_KEY] = secrets.token_urlsafe(16)
+    return nonce
+
+
+def make_token(session) -> str:
+    """'<issued, hex>.<HMAC(nonce:issued)>'; nothing is stored per token."""
+    issued = int(time.time()) // _STEP * _STEP
+    return f"{issued:x}.{_signature(session_nonce(session), issued)}"
+
+
+def check_token(session, token: Optional[str], max_age: Optional[int] = None) -> bool:
+    """True if `token` was issued for this session's nonce within `max_age` seconds."""
+    nonce = session.get(_NONCE_KEY)
+    if not isinstance(token, str) or nonce is None or "." not in token:
+        return False
+    issued_hex, signature = token.split(".", 1)
+    try:
+        issued = int(issued_hex, 16)
+    except ValueError:
+        return False
+    age = time.time() - issued
+    if age < -_STEP or age > (max_age or settings.CSRF_TOKEN_MAX_AGE) + _STEP:
+        return False
+    return hmac.compare_digest(signature, _signature(nonce, issued))
+
+
+def csrf_token(request: Request) -> str:
+    """Token for forms rendered by this request; also available as {{ csrf_token(request) }}."""
+    token = getattr(request.state, "csrf_token", None)
+    if token is None:
+        token = request.state.csrf_token = make_token(request.session)
+    return token
+
+
+async def csrf_protect(request: Request) -> None:
+    """
+    FastAPI dependency rejecting unsafe requests without a valid token:
+
+        @router.post("/save", dependencies=[Depends(csrf_protect)])
+    """
+    if request.method in SAFE_METHODS:
+        return
+    token = request.headers.get(HEADER)
+    if token is None:
+        token = (await request.form()).get(FORM_FIELD)
+    if not check_token(request.session, token):
+        raise HTTPException(status_code=403, detail="CSRF token missing or invalid.")
+
+
+class CSRFMiddleware:
+    """
+    Validates every unsafe request (token in the X-CSRF-Token header or the
+    csrf_token form field). Must run inside the session middleware.
+    """
+
+    def __init__(self, app, exempt=None):
+        self.app = app
+        if exempt is None:
+            exempt = [path.strip() for path in settings.CSRF_EXEMPT.split(",") if path.strip()]
+        self.exempt = tuple(path.rstrip("/") or "/" for path in exempt)
+
+    def is_exempt(self, path: str) -> bool:
+        """"/admin" exempts /admin and /admin/..., not /administrator."""
+        return any(
+            path == prefix or path.startswith(prefix.rstrip("/") + "/") for prefix in self.exempt
+        )
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or self.is_exempt(scope["path"])
+        ):
+            return await self.app(scope, receive, send)
+
+        request = Request(scope, receive)
+        token = request.headers.get(HEADER)
+        if token is None:
+            # Read the form from a copy of the body and replay it to the app
+            received = []
+
+            async def recording_receive():
+                message = await receive()
+                received.append(message)
+                return message
+
+            form = await Request(scope, recording_receive).form()
+            token = form.get(FORM_FIELD)
+            await form.close()
+
+            async def replay_receive():
+                if received:
+                    return received.pop(0)
+                return await receive()
+
+            receive = replay_receive
+
+        if not check_token(scope["session"], token):
+            response = PlainTextResponse("CSRF token missing or invalid.", status_code=403)
+            return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+'''.lstrip()
+    with open(f"{app_name}/core/csrf.py", "w") as f:
+        f.write(csrf_py)
+
+    # Create core/middleware.py
+    middleware_py = '''
+# core/middleware.py
+import gzip
+import hashlib
+import zlib
+from email.utils import parsedate_to_datetime
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is negotiated without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+    "image/svg+xml",
+)
+
+
+def choose_encoding(accept_encoding: str, available=None):
+    """
+    The preferred of `available` (default: 'br' if brotli is installed, then
+    'gzip') allowed by an Accept-Encoding header, q-values honoured; else None.
+    """
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    wildcard = offered.get("*", 0.0)
+    best, best_q = None, 0.0
+    if available is None:
+        available = ("br", "gzip") if brotli is not None else ("gzip",)
+    for name in available:
+        q = offered.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class _Compressor:
+    """Incremental gzip/brotli compressor; flush() keeps streamed chunks moving."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compresses text-like responses with brotli or gzip per Accept-Encoding.
+
+    Bodies below `minimum_size`, responses that are already encoded (e.g.
+    precompressed static files) and file responses serving byte ranges pass
+    through. Streamed responses are
+    compressed chunk by chunk and flushed, so early bytes still arrive early.
+    """
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    # FileResponse (uncollected static files): ranges address the raw bytes
+                    or "accept-ranges" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                    or "no-transform" in headers.get("cache-control", "")
+                ):
+                    await send(message)
+                else:
+                    start = message  # held until the first body chunk
+                return
+
+            if message["type"] != "http.response.body" or (start is None and compressor is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # The encoded bytes differ, so a strong validator no longer holds
+                    headers["etag"] = "W/" + etag
+                if more_body:
+                    del headers["content-length"]
+                    compressor = _Compressor(encoding)
+                else:
+                    body = compress(body, encoding)
+                    headers["content-length"] = str(len(body))
+                    await send(start)
+                    start = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+                start = None
+
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, final=not more_body),
+                    "more_body": more_body,
+                }
+            )
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds a weak ETag to complete HTML responses and answers If-None-Match
+    (or If-Modified-Since, when the handler set Last-Modified) with 304 Not
+    Modified.
+
+    Pages default to "Cache-Control: private, no-cache": browsers revalidate
+    on every view and shared caches never store per-user pages. Streamed
+    responses pass through unchanged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] == 200 and headers.get("content-type", "").startswith("text/html"):
+                    start = message
+                else:
+                    await send(message)
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            if message.get("more_body", False):
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            etag = headers.get("etag")
+            if etag is None:
+                etag = headers["etag"] = 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+            if "cache-control" not in headers:
+                headers["cache-control"] = "private, no-cache"
+            start, response_start = None, start
+
+            if _not_modified(request_headers, etag, headers.get("last-modified")):
+                for name in ("content-length", "content-type", "content-encoding"):
+                    if name in headers:
+                        del headers[name]
+                response_start["status"] = 304
+                await send(response_start)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _not_modified(request_headers, etag, last_modified):
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/"x" matches "x"
+        candidates = {_opaque(tag.strip()) for tag in if_none_match.split(",")}
+        return "*" in candidates or _opaque(etag) in candidates
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+'''.lstrip()
+    with open(f"{app_name}/core/middleware.py", "w") as f:
+        f.write(middleware_py)
+
+    # Create core/pagination.py
+    pagination_py = '''
+# core/pagination.py
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select, tuple_
+from sqlalchemy.sql import operators
+
+# Capped counts stop here and report "1000+"
+COUNT_CAP = 1000
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that can't be decoded (tampered with or from another query)."""
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    if isinstance(value, UUID):
+        return {"u": str(value)}
+    return value
+
+
+_LOADERS = {"dt": datetime.fromisoformat, "d": date.fromisoformat, "dec": Decimal, "u": UUID}
+
+
+def _load(value):
+    if isinstance(value, dict):
+        (kind, raw), = value.items()
+        return _LOADERS[kind](raw)
+    return value
+
+
+def encode_cursor(direction: str, values) -> str:
+    """Opaque token for the row with sort key `values`; direction is "next" or "prev"."""
+    payload = json.dumps([direction[0], [_dump(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str):
+    """(direction, values) from encode_cursor(); raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        direction, values = json.loads(raw)
+        return {"n": "next", "p": "prev"}[direction], [_load(v) for v in values]
+    except Exception as exc:
+        raise InvalidCursor(token) from exc
+
+
+class Page:
+    """One page of results plus the cursors of its neighbours."""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None, count_kind=None):
+        self.items: List[Any] = items
+        self.per_page = per_page
+        self.next_cursor: Optional[str] = next_cursor
+        self.prev_cursor: Optional[str] = prev_cursor
+        self.total: Optional[int] = total
+        self.count_kind: Optional[str] = count_kind  # "exact", "estimate" or "at_least"
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    @property
+    def total_label(self) -> Optional[str]:
+        """'1,234', '~1,234' (planner estimate) or '1,000+' (capped count)."""
+        if self.total is None:
+            return None
+        label = f"{self.total:,}"
+        if self.count_kind == "estimate":
+            return "~" + label
+        if self.count_kind == "at_least":
+            return label + "+"
+        return label
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _sort_keys(order_by):
+    """[(column, descending)] from columns and column.desc() / column.asc() clauses."""
+    keys = []
+    for clause in order_by:
+        modifier = getattr(clause, "modifier", None)
+        if modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+    return keys
+
+
+def _seek(keys, values, forward):
+    """WHERE clause selecting the rows after `values` in the walking direction."""
+    descending = [desc if forward else not desc for _, desc in keys]
+    columns = [column for column, _ in keys]
+    if len(set(descending)) == 1:
+        # Uniform direction: one row-value comparison, which indexes handle well
+        if len(columns) == 1:
+            left, right = columns[0], values[0]
+        else:
+            left, right = tuple_(*columns), tuple_(*values)
+        return left < right if descending[0] else left > right
+    clauses = []
+    for i, (column, desc) in enumerate(zip(columns, descending)):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i] if desc else column > values[i]))
+    return or_(*clauses)
+
+
+def _key_of(item, keys):
+    mapping = getattr(item, "_mapping", None)
+    if mapping is not None:
+        return [mapping[column] for column, _ in keys]
+    return [getattr(item, column.key) for column, _ in keys]
+
+
+def _returns_entities(stmt) -> bool:
+    descriptions = stmt.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+
+def count(db, stmt, mode="estimate", cap=COUNT_CAP):
+    """
+    (total, kind) for `stmt` without its ORDER BY.
+
+    "exact" runs COUNT(*). "estimate" asks the PostgreSQL planner (EXPLAIN)
+    and elsewhere counts at most `cap` rows, reporting "at_least" past that.
+    """
+    stmt = stmt.order_by(None)
+    if mode == "exact":
+        return db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one(), "exact"
+
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        compiled = stmt.compile(dialect=connection.dialect)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), "estimate"
+
+    capped = db.execute(select(func.count()).select_from(stmt.limit(cap + 1).subquery())).scalar_one()
+    if capped > cap:
+        return cap, "at_least"
+    return capped, "exact"
+
+
+def paginate(
+    db,
+    stmt,
+    order_by,
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    with_count: Optional[str] = None,
+) -> Page:
+    """
+    Keyset (seek) pagination: every page costs one indexed range scan, however deep.
+
+    `order_by` must end in a unique column (usually the primary key), e.g.
+
+        page = paginate(
+            db,
+            select(Post).where(Post.published),
+            [Post.created_at.desc(), Post.id.desc()],
+            cursor=request.query_params.get("cursor"),
+        )
+
+    with_count="exact"/"estimate" also fills page.total (see count()).
+    Raises InvalidCursor for a malformed cursor.
+    """
+    keys = _sort_keys(order_by)
+    direction, values = decode_cursor(cursor) if cursor else ("next", None)
+    if values is not None and len(values) != len(keys):
+        raise InvalidCursor(cursor)
+    forward = direction == "next"
+
+    # Walking backwards flips every column, then the page is reversed again
+    ordering = [
+        column.desc() if (desc if forward else not desc) else column.asc() for column, desc in keys
+    ]
+    query = stmt.order_by(None).order_by(*ordering).limit(per_page + 1)
+    if values is not None:
+        query = query.where(_seek(keys, values, forward))
+
+    result = db.execute(query)
+    rows = list(result.scalars() if _returns_entities(stmt) else result)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    has_next = has_more if forward else values is not None
+    has_prev = values is not None if forward else has_more
+    page = Page(
+        rows,
+        per_page,
+        next_cursor=encode_cursor("next", _key_of(rows[-1], keys)) if has_next and rows else None,
+        prev_cursor=encode_cursor("prev", _key_of(rows[0], keys)) if has_prev and rows else None,
+    )
+    if with_count:
+        page.total, page.count_kind = count(db, stmt, with_count)
+    return page
+
+
+async def paginate_async(
+    db,
+    stmt,
+    order_by,
+    cursor: Optional[str] = None,
+    per_page: int = 20,
+    with_count: Optional[str] = None,
+) -> Page:
+    """paginate() for an AsyncSession."""
+    return await db.run_sync(paginate, stmt, order_by, cursor, per_page, with_count)
+
+
+def page_url(request, cursor: str, param: str = "cursor") -> str:
+    """The current URL with `param` set to `cursor` (other query parameters kept)."""
+    return str(request.url.include_query_params(**{param: cursor}))
+'''.lstrip()
+    with open(f"{app_name}/core/pagination.py", "w") as f:
+        f.write(pagination_py)
+
+    # Create core/query_cache.py
+    query_cache_py = '''
+# core/query_cache.py
+import hashlib
+import importlib
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import Table, event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, loading
+from sqlalchemy.orm.interfaces import UserDefinedOption
+from sqlalchemy.sql.util import find_tables
+
+from core.config import settings
+
+# Tables written by the session's current transaction
+_WRITTEN = "query_cache_written"
+
+
+class QueryCacheBackend:
+    """
+    Interface for query cache stores (core.render_cache.RenderCache is the
+    in-process one). Entries are tagged with the table names a query reads.
+
+    Subclass it to share the cache between workers (Redis, memcached, ...) and
+    point settings.QUERY_CACHE_BACKEND at "module.ClassName". Values are
+    SQLAlchemy FrozenResult objects, which pickle.
+    """
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: int, tags: Iterable[str] = ()) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+_backend = None
+
+
+def get_backend():
+    """The backend named by settings.QUERY_CACHE_BACKEND, built on first use."""
+    global _backend
+    if _backend is None:
+        name = settings.QUERY_CACHE_BACKEND
+        if name == "memory":
+            from core.render_cache import RenderCache
+
+            _backend = RenderCache(settings.QUERY_CACHE_MAXSIZE)
+        else:
+            module_name, class_name = name.rsplit(".", 1)
+            _backend = getattr(importlib.import_module(module_name), class_name)()
+    return _backend
+
+
+class FromCache(UserDefinedOption):
+    """Statement option created by cached()."""
+
+    propagate_to_loaders = False
+
+    def __init__(self, ttl: Optional[int] = None, tables: Optional[Iterable[str]] = None):
+        self.ttl = ttl or settings.QUERY_CACHE_TTL
+        self.tables = tuple(tables) if tables else None
+
+
+def cached(ttl: Optional[int] = None, tables: Optional[Iterable[str]] = None) -> FromCache:
+    """
+    Opt a SELECT into the query cache:
+
+        db.execute(select(Category).options(cached(ttl=300))).scalars().all()
+
+    Results are keyed on the compiled SQL and its parameters, and dropped when
+    a commit writes to any table the query reads (`tables` overrides that list).
+    """
+    return FromCache(ttl, tables)
+
+
+def cached_query(db, stmt, ttl: Optional[int] = None, tables: Optional[Iterable[str]] = None):
+    """db.execute(stmt) through the cache; await it with an AsyncSession."""
+    return db.execute(stmt.options(cached(ttl, tables)))
+
+
+def invalidate(*tables: str) -> None:
+    """Drop cached results reading `tables`, e.g. after raw SQL writes."""
+    get_backend().invalidate_tags(*tables)
+
+
+def tables_of(statement) -> tuple:
+    return tuple(
+        sorted(
+            {
+                table.name
+                for table in find_tables(statement, include_aliases=True, include_crud=True)
+                if isinstance(table, Table)
+            }
+        )
+    )
+
+
+def _cache_key(state) -> str:
+    bind = state.session.get_bind(**state.bind_arguments)
+    compiled = state.statement.compile(dialect=bind.dialect)
+    params = dict(compiled.params)
+    params.update(state.parameters or {})
+    raw = f"{compiled}|{sorted(params.items())!r}"
+    return "query:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+        state.session.info.setdefault(_WRITTEN, set()).update(tables_of(state.statement))
+        return None
+    if not state.is_select:
+        return None
+    option = next((opt for opt in state.user_defined_options if isinstance(opt, FromCache)), None)
+    if option is None:
+        return None
+
+    session = state.session
+    tables = option.tables or tables_of(state.statement)
+    written = session.info.get(_WRITTEN)
+    if (written and written.intersection(tables)) or session.new or session.deleted or session.dirty:
+        # This transaction has changes the cached result can't reflect
+        return None
+
+    backend = get_backend()
+    key = _cache_key(state)
+    frozen = backend.get(key)
+    if frozen is None:
+        frozen = state.invoke_statement().freeze()
+        backend.set(key, frozen, option.ttl, tables)
+        return frozen()
+    if state.is_orm_statement:
+        # Attach the cached objects to this session without emitting SQL
+        return loading.merge_frozen_result(session, state.statement, frozen, load=False)()
+    return frozen()
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    written = session.info.setdefault(_WRITTEN, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        written.update(table.name for table in sa_inspect(obj).mapper.tables)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    written = session.info.pop(_WRITTEN, None)
+    if written:
+        get_backend().invalidate_tags(*written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_WRITTEN, None)
+'''.lstrip()
+    with open(f"{app_name}/core/query_cache.py", "w") as f:
+        f.write(query_cache_py)
+
+    # Create core/templates.py
+    templates_py = '''
+# core/templates.py
+import glob
+import os
+
+from fastapi.responses import StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, TemplateNotFound
+
+from core.config import settings
+from core.csrf import csrf_token, session_nonce
+from core.pagination import page_url
+from core.render_cache import FragmentCacheExtension
+from core.staticfiles import static
+
+
+def template_dirs():
+    """Project templates first, then every feature's templates/ directory."""
+    return ["templates"] + sorted(
+        path for path in glob.glob(os.path.join("*", "templates")) if path != "templates"
+    )
+
+
+class SharedEnvironment(Environment):
+    """
+    One environment for the whole project.
+
+    Feature templates are addressed as "<feature>/<name>.html". Inside them,
+    bare names such as {% extends "base.html" %} resolve to the same feature
+    first, so feature templates keep working unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._joined = {}
+
+    def join_path(self, template, parent):
+        key = (template, parent)
+        # With auto_reload (DEBUG) templates come and go, so nothing is cached
+        joined = None if self.auto_reload else self._joined.get(key)
+        if joined is None:
+            joined = template
+            if "/" not in template and "/" in parent:
+                candidate = parent.rsplit("/", 1)[0] + "/" + template
+                try:
+                    self.loader.get_source(self, candidate)
+                    joined = candidate
+                except TemplateNotFound:
+                    pass
+            if not self.auto_reload:
+                self._joined[key] = joined
+        return joined
+
+
+os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+
+env = SharedEnvironment(
+    loader=FileSystemLoader(template_dirs()),
+    bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR),
+    auto_reload=settings.debug,
+    autoescape=True,
+    extensions=[FragmentCacheExtension],
+)
+env.globals["static"] = static
+env.globals["csrf_token"] = csrf_token
+env.globals["page_url"] = page_url
+templates = Jinja2Templates(env=env)
+# Same loader and globals, compiled for generate_async(). Async code differs from
+# sync code, so it needs its own bytecode files.
+async_env = env.overlay(
+    enable_async=True,
+    bytecode_cache=FileSystemBytecodeCache(
+        settings.TEMPLATE_CACHE_DIR, pattern="__jinja2_async_%s.cache"
+    ),
+)
+
+
+def precompile() -> int:
+    """Compile every template into the bytecode cache. Returns the template count."""
+    names = env.list_templates(extensions=["html", "htm", "xml", "txt", "jinja", "j2"])
+    for name in names:
+        env.get_template(name)
+        async_env.get_template(name)
+    return len(names)
+
+
+async def _buffered(chunks, chunk_size):
+    """Coalesce Jinja's tiny output events; flush early once </head> is rendered."""
+    buffer = []
+    size = 0
+    head_sent = False
+    async for piece in chunks:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size or (not head_sent and "</head>" in piece):
+            head_sent = True
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_template(
+    request,
+    name: str,
+    context: dict = None,
+    status_code: int = 200,
+    headers: dict = None,
+    chunk_size: int = 4096,
+) -> StreamingResponse:
+    """
+    Render `name` progressively instead of building the whole page in memory.
+
+    The <head> and layout are sent as soon as they are rendered; the rest is
+    streamed in `chunk_size` pieces. Async iterables in the context (e.g.
+    `(await db.stream_scalars(stmt))`) can be looped over directly with
+    {% for %} and are consumed while the response is being sent.
+    """
+    context = {"request": request, **(context or {})}
+    template = async_env.get_template(name)
+    if "session" in request.scope:
+        # The body renders after the session is saved; create the CSRF nonce
+        # now so {{ csrf_token(request) }} doesn't have to write it later
+        session_nonce(request.session)
+    return StreamingResponse(
+        _buffered(template.generate_async(context), chunk_size),
+        status_code=status_code,
+        headers=headers,
+        media_type="text/html",
+    )
+'''.lstrip()
+    with open(f"{app_name}/core/templates.py", "w") as f:
+        f.write(templates_py)
+
+    admin_loader_py = '''
+# core/admin_loader.py
+import importlib
+import json
+
+from core.config import ADMIN_MODULES, settings
+
+# sqladmin is imported inside the functions below so that workers that never
+# serve /admin don't pay for it at boot.
+
+
+def _find_admin_module(name: str):
+    # Supports both 'app' and 'app.admin' module names.
+    try:
+        package = importlib.import_module(name)
+    except ModuleNotFoundError:
+        # maybe it was just the app name (e.g. 'users')
+        try:
+            package = importlib.import_module(f"{name}.admin")
+        except ModuleNotFoundError:
+            return None
+
+    # If the module itself is the admin module, skip iterating
+    if not hasattr(package, "__path__"):
+        return package
+    # find its admin.py submodule
+    try:
+        return importlib.import_module(f"{name}.admin")
+    except ModuleNotFoundError:
+        return None
+
+
+def discover_admin_views(module_names: list[str]) -> list[str]:
+    """Scan modules for ModelView subclasses, returned as 'module:ClassName' paths."""
+    from sqladmin import ModelView
+
+    views = []
+    for name in module_names:
+        module = _find_admin_module(name)
+        if module is None:
+            continue
+        # Now scan for subclasses of ModelView
+        for attr_name in dir(module):
+            attr = getattr(module, attr_name)
+            if (
+                isinstance(attr, type)
+                and issubclass(attr, ModelView)
+                and attr is not ModelView
+            ):
+                path = f"{attr.__module__}:{attr.__qualname__}"
+                if path not in views:
+                    views.append(path)
+    return views
+
+
+def build_manifest(module_names: list[str] = ADMIN_MODULES) -> list[str]:
+    """Write settings.ADMIN_MANIFEST (used by `archonkit buildadmin`)."""
+    views = discover_admin_views(module_names)
+    with open(settings.ADMIN_MANIFEST, "w") as f:
+        json.dump({"modules": list(module_names), "views": views}, f, indent=2)
+    return views
+
+
+def load_manifest(module_names: list[str]):
+    """Views listed in the manifest, or None in DEBUG / when missing or stale."""
+    if settings.debug:
+        return None
+    try:
+        with open(settings.ADMIN_MANIFEST) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("modules") != list(module_names):
+        return None
+    return manifest["views"]
+
+
+def register_admin_views(admin, module_names: list[str]):
+    """
+    Register every ModelView found in `module_names` on `admin`.
+
+    Outside DEBUG the classes come straight from the buildadmin manifest
+    (one import per module); otherwise the modules are scanned.
+    """
+    views = load_manifest(module_names)
+    if views is None:
+        views = discover_admin_views(module_names)
+    for path in views:
+        module_name, class_name = path.split(":")
+        admin.add_view(getattr(importlib.import_module(module_name), class_name))
+
+
+class LazyAdmin:
+    """ASGI app that builds the sqladmin Admin and its views on the first /admin request."""
+
+    def __init__(self, engine, module_names: list[str], **admin_kwargs):
+        self.engine = engine
+        self.module_names = module_names
+        self.admin_kwargs = admin_kwargs
+        self._app = None
+
+    @property
+    def routes(self):
+        # Lets url_for("admin:...") resolve once the admin has been built
+        return self._app.routes if self._app is not None else []
+
+    def _build(self):
+        from sqladmin import Admin
+        from starlette.applications import Starlette
+
+        # Admin mounts itself onto the app it is given; we serve admin.admin ourselves
+        admin = Admin(Starlette(), self.engine, **self.admin_kwargs)
+        register_admin_views(admin, self.module_names)
+        return admin.admin
+
+    async def __call__(self, scope, receive, send):
+        if self._app is None:
+            self._app = self._build()
+        await self._app(scope, receive, send)
+
+
+def mount_admin(app, engine, module_names: list[str] = ADMIN_MODULES, base_url: str = "/admin", lazy: bool = True, **admin_kwargs):
+    """Mount sqladmin at `base_url`; with lazy=True nothing is imported until the first request."""
+    if lazy:
+        app.mount(base_url, LazyAdmin(engine, module_names, base_url=base_url, **admin_kwargs), name="admin")
+        return None
+    from sqladmin import Admin
+
+    admin = Admin(app, engine, base_url=base_url, **admin_kwargs)
+    register_admin_views(admin, module_names)
+    return admin
+'''.lstrip()
     with open(f"{app_name}/core/admin_loader.py", "w") as f:
         f.write(admin_loader_py)
@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from .app_scaffold import create_app
+from .feature_scaffold import create_features, inject_features_to_main, write_atomic
+
+BENCH_APP = "benchapp"
+
+USER_MODEL = """from sqlalchemy import Column, Integer, String
+from core.database import Base
+
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True)
+    username = Column(String(50), unique=True)
+"""
+
+PAGES_ROUTES = """from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse
+from core import messages
+from core.csrf import csrf_token
+from core.decorators import login_required
+from core.templates import templates
+
+router = APIRouter(prefix="/pages", tags=["pages"])
+
+
+@router.get("/", response_class=HTMLResponse)
+async def feature_root(request: Request):
+    return templates.TemplateResponse("pages/index.html", {"request": request, "msg": "Welcome to pages!"})
+
+
+@router.get("/login")
+async def login(request: Request):
+    request.session["user_id"] = 1
+    return PlainTextResponse("ok")
+
+
+@router.get("/protected", response_class=HTMLResponse)
+@login_required
+async def protected(request: Request):
+    return templates.TemplateResponse("pages/index.html", {"request": request, "msg": request.state.user.username})
+
+
+@router.post("/flash")
+async def flash(request: Request):
+    messages.success(request, "Saved!")
+    return RedirectResponse("/pages/messages", status_code=303)
+
+
+@router.get("/messages", response_class=HTMLResponse)
+async def show_messages(request: Request):
+    return templates.TemplateResponse("pages/messages.html", {"request": request, "messages": messages.pop_all(request)})
+
+
+@router.get("/form", response_class=HTMLResponse)
+async def form(request: Request):
+    return templates.TemplateResponse("pages/form.html", {"request": request})
+"""
+
+PAGES_TEMPLATES = {
+    "messages.html": (
+        "{% for m in messages %}<p class=\"{{ m.level }}\">{{ m.message }}</p>{% endfor %}"
+    ),
+    "form.html": (
+        '<form method="post"><input type="hidden" name="csrf_token" value="{{ csrf_token(request) }}">'
+        '<input name="title"><button>Save</button></form>'
+    ),
+}
+
+# name -> the requests making up one iteration; `login` scenarios log the client in first
+SCENARIOS = {
+    "root": {"requests": [("GET", "/")]},
+    "feature_page": {"requests": [("GET", "/pages/")]},
+    "login_required": {"requests": [("GET", "/pages/protected")], "login": True},
+    "flash_roundtrip": {"requests": [("POST", "/pages/flash"), ("GET", "/pages/messages")]},
+    "csrf_form": {"requests": [("GET", "/pages/form")]},
+}
+
+
+def scaffold_bench_app(root, async_db=False):
+    """Scaffold an app with a `users` and a `pages` feature into `root`; return its path."""
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        create_app(BENCH_APP, async_db=async_db)
+        os.chdir(BENCH_APP)
+        create_features(["users", "pages"])
+        inject_features_to_main(".", ["users", "pages"])
+        write_atomic(os.path.join("users", "models.py"), USER_MODEL)
+        write_atomic(os.path.join("pages", "routes.py"), PAGES_ROUTES)
+        for name, content in PAGES_TEMPLATES.items():
+            write_atomic(os.path.join("pages", "templates", "pages", name), content)
+        url = "sqlite+aiosqlite:///./bench.db" if async_db else "sqlite:///./bench.db"
+        write_atomic(".env", f"DATABASE_URL={url}\nSECRET_KEY=bench\nDEBUG=false\n")
+    finally:
+        os.chdir(cwd)
+    return os.path.join(root, BENCH_APP)
+
+
+async def _prepare_database():
+    from sqlalchemy import insert
+
+    from core.database import Base, engine
+    from users.models import User
+
+    if hasattr(engine, "sync_engine"):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(insert(User).values(id=1, username="bench"))
+    else:
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(User).values(id=1, username="bench"))
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def _run_scenario(app, scenario, iterations, concurrency, warmup):
+    import httpx
+
+    latencies = []
+    warmed_up = []
+    go = asyncio.Event()
+
+    async def worker(count):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if scenario.get("login"):
+                await client.get("/pages/login")
+            for i in range(warmup + count):
+                if i == warmup:
+                    # Every client starts measuring together, once all have warmed up
+                    warmed_up.append(time.perf_counter())
+                    if len(warmed_up) == concurrency:
+                        go.set()
+                    await go.wait()
+                start = time.perf_counter()
+                for method, path in scenario["requests"]:
+                    response = await client.request(method, path)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{method} {path} returned {response.status_code}")
+                if i >= warmup:
+                    latencies.append(time.perf_counter() - start)
+            return time.perf_counter()
+
+    ends = await asyncio.gather(
+        *(worker(max(1, iterations // concurrency)) for _ in range(concurrency))
+    )
+    elapsed = max(ends) - max(warmed_up)
+    latencies.sort()
+    requests = len(latencies) * len(scenario["requests"])
+    return {
+        "iterations": len(latencies),
+        "requests": requests,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+
+
+def run_bench(app_dir, scenarios=None, iterations=1000, concurrency=1, warmup=50):
+    """
+    Import the scaffolded app in `app_dir` and benchmark it in-process.
+
+    Returns {"meta": {...}, "results": {scenario: {rps, p50_ms, p99_ms, ...}}}.
+    """
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    import main
+
+    asyncio.run(_prepare_database())
+    names = scenarios or list(SCENARIOS)
+    results = {}
+    for name in names:
+        results[name] = asyncio.run(
+            _run_scenario(main.app, SCENARIOS[name], iterations, concurrency, warmup)
+        )
+    return {
+        "meta": {
+            "archonkit": _archonkit_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def _archonkit_version():
+    try:
+        from importlib.metadata import version
+
+        return version("archonkit")
+    except Exception:
+        return "unknown"
+
+
+def compare_results(previous, current):
+    """Lines comparing two run_bench() reports, scenario by scenario."""
+    lines = []
+    for name, result in current["results"].items():
+        before = previous.get("results", {}).get(name)
+        if not before:
+            continue
+        parts = []
+        for key in ("rps", "p50_ms", "p99_ms"):
+            if before.get(key) and result.get(key):
+                change = (result[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {change:+.1f}%")
+        lines.append(f"{name:<16} " + "  ".join(parts))
+    return lines
+
+
+def write_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz variants are written without it
+    brotli = None
+
+MANIFEST_NAME = "staticfiles.json"
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".mjs",
+    ".map",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".html",
+    ".ico",
+    ".wasm",
+}
+
+
+def find_static_dirs(app_dir=".", exclude=None):
+    """
+    Return {feature_name: static_dir} for every <feature>/static directory,
+    skipping anything inside `exclude` (the collectstatic output).
+    """
+    excluded = os.path.realpath(exclude) if exclude else None
+    static_dirs = {}
+    for name in sorted(os.listdir(app_dir)):
+        static_dir = os.path.join(app_dir, name, "static")
+        if name.startswith(".") or not os.path.isdir(static_dir):
+            continue
+        real = os.path.realpath(os.path.join(app_dir, name))
+        if excluded and (real == excluded or real.startswith(excluded + os.sep)):
+            continue
+        static_dirs[name] = static_dir
+    return static_dirs
+
+
+def hashed_name(path, content):
+    """'users/app.css' -> 'users/app.<md5[:12]>.css'"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.md5(content).hexdigest()[:12]}{ext}"
+
+
+def _write_compressed(path, content, compress):
+    """Write the .gz/.br variants of `path`; return the paths written."""
+    if not compress or os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return []
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content, quality=11)))
+    written = []
+    for suffix, data in variants:
+        # Serving a variant only pays off if it is actually smaller
+        if len(data) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(data)
+            written.append(path + suffix)
+    return written
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _prune(output_dir, previous_manifest, written):
+    """
+    Remove files a previous run wrote (per its manifest) that this run didn't.
+
+    Only names from the old manifest are considered, so unrelated files in
+    `output_dir` are never touched.
+    """
+    for entry in previous_manifest.items():
+        for relative in entry:
+            base = os.path.join(output_dir, *relative.split("/"))
+            for path in (base, base + ".gz", base + ".br"):
+                if path not in written and os.path.isfile(path):
+                    os.remove(path)
+                    _remove_empty_parents(os.path.dirname(path), output_dir)
+
+
+def _remove_empty_parents(directory, stop):
+    while os.path.realpath(directory) != os.path.realpath(stop):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def collect_static(app_dir=".", output_dir="staticfiles", compress=True):
+    """
+    Copy every feature's static/ directory into `output_dir`.
+
+    Each file is written under its original and its content-hashed name
+    (plus .gz/.br variants), and `output_dir/staticfiles.json` maps the
+    original path ('users/app.css') to the hashed one. Files left over from
+    the previous run (older hashed names, stale variants) are removed.
+    """
+    output_dir = os.path.join(app_dir, output_dir)
+    previous_manifest = _load_manifest(output_dir)
+    manifest = {}
+    written = set()
+
+    for feature_name, static_dir in find_static_dirs(app_dir, exclude=output_dir).items():
+        for root, _, files in os.walk(static_dir):
+            for filename in files:
+                source = os.path.join(root, filename)
+                relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+                path = f"{feature_name}/{relative}"
+                with open(source, "rb") as f:
+                    content = f.read()
+
+                hashed = hashed_name(path, content)
+                manifest[path] = hashed
+                for target_path in (path, hashed):
+                    target = os.path.join(output_dir, *target_path.split("/"))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, target)
+                    written.add(target)
+                    written.update(_write_compressed(target, content, compress))
+
+    _prune(output_dir, previous_manifest, written)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
@@ -1,7 +1,25 @@
+import ast
 import os
+import re
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 
 
-def create_feature(feature_name):
+def write_atomic(path, content):
+    """Write to a temp file in the same directory, then rename it over `path`."""
+    tmp_path = os.path.join(os.path.dirname(path) or ".", f".tmp-{secrets.token_hex(8)}")
+    # Opened with 0666 like open() does, so the process umask applies as usual
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def create_feature(feature_name, streaming=False):
     # Create feature directory structure
     os.makedirs(feature_name, exist_ok=True)
     os.makedirs(os.path.join(feature_name, "templates", feature_name), exist_ok=True)
@@ -10,22 +28,25 @@ def create_feature(feature_name):
     # Create empty forms.py and models.py
     forms_imports = """from pydantic import BaseModel, Field, EmailStr, field_validator
 """
-    with open(os.path.join(feature_name, "forms.py"), "w") as f:
-        f.write(forms_imports)
+    write_atomic(os.path.join(feature_name, "forms.py"), forms_imports)
 
     # Write SQLAlchemy + Base imports to models.py
     models_imports = """from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey
 from core.database import Base
 """
-    with open(os.path.join(feature_name, "models.py"), "w") as f:
-        f.write(models_imports)
+    write_atomic(os.path.join(feature_name, "models.py"), models_imports)
 
     # Boilerplate routes.py with template rendering
+    if streaming:
+        render_import = "from core.templates import stream_template"
+        render_call = f'stream_template(request, "{feature_name}/index.html", {{"msg": "Welcome to {feature_name}!"}})'
+    else:
+        render_import = "from core.templates import templates"
+        render_call = f'templates.TemplateResponse("{feature_name}/index.html", {{"request": request, "msg": "Welcome to {feature_name}!"}})'
+
     routes_boilerplate = f"""from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-
-templates = Jinja2Templates(directory="{feature_name}/templates/{feature_name}")
+{render_import}
 
 router = APIRouter(
     prefix="/{feature_name}",
@@ -34,10 +55,9 @@ router = APIRouter(
 
 @router.get("/", response_class=HTMLResponse)
 async def feature_root(request: Request):
-    return templates.TemplateResponse("index.html", {{"request": request, "msg": "Welcome to {feature_name}!"}})
+    return {render_call}
 """
-    with open(os.path.join(feature_name, "routes.py"), "w") as f:
-        f.write(routes_boilerplate)
+    write_atomic(os.path.join(feature_name, "routes.py"), routes_boilerplate)
 
     # Boilerplate base.html for template inheritance
     base_html = """<!DOCTYPE html>
@@ -52,10 +72,9 @@ async def feature_root(request: Request):
 </body>
 </html>
 """
-    with open(
-        os.path.join(feature_name, "templates", feature_name, "base.html"), "w"
-    ) as f:
-        f.write(base_html)
+    write_atomic(
+        os.path.join(feature_name, "templates", feature_name, "base.html"), base_html
+    )
 
     # Boilerplate index.html extending base.html
     index_html = """{% extends "base.html" %}
@@ -63,58 +82,238 @@ async def feature_root(request: Request):
 <h1>{{ msg }}</h1>
 {% endblock %}
 """
-    with open(
-        os.path.join(feature_name, "templates", feature_name, "index.html"), "w"
-    ) as f:
-        f.write(index_html)
+    write_atomic(
+        os.path.join(feature_name, "templates", feature_name, "index.html"), index_html
+    )
+
+
+def create_features(feature_names, streaming=False):
+    """Scaffold several features concurrently (file I/O bound, so threads suffice)."""
+    with ThreadPoolExecutor(max_workers=min(8, len(feature_names) or 1)) as pool:
+        list(pool.map(lambda name: create_feature(name, streaming=streaming), feature_names))
 
 
 def inject_feature_to_main(app_dir, feature_name):
-    main_py = os.path.join(app_dir, "main.py")
+    inject_features_to_main(app_dir, [feature_name])
+
+
+def _call_target(node):
+    """'app.mount' / 'static_app.register' / ... for a call, else None."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        if isinstance(node.func.value, ast.Name):
+            return f"{node.func.value.id}.{node.func.attr}"
+    return None
+
+
+def _first_arg(call):
+    if call.args and isinstance(call.args[0], ast.Constant):
+        return call.args[0].value
+    if call.args and isinstance(call.args[0], ast.Attribute):
+        if isinstance(call.args[0].value, ast.Name):
+            return call.args[0].value.id
+    return None
+
+
+class MainLayout:
+    """
+    Where things live in main.py, collected in a single walk over its AST.
+
+    Line numbers are the 1-based end lines of the top-level statements, so
+    new code goes after a whole statement (even a multi-line or nested one).
+    """
+
+    def __init__(self, tree):
+        self.last_import = 0
+        self.app_line = None
+        self.last_mount = None
+        self.last_router = None
+        self.imports = set()
+        self.static_prefixes = set()
+        self.mount_paths = set()
+        self.routers = set()
+        self.uses_dispatcher = False
+        self.uses_registry = False
+
+        for stmt in tree.body:
+            if isinstance(stmt, ast.Import):
+                self.last_import = stmt.end_lineno
+                self.imports.update((alias.name, alias.asname) for alias in stmt.names)
+            elif isinstance(stmt, ast.ImportFrom):
+                self.last_import = stmt.end_lineno
+                if any(alias.name == "static_app" for alias in stmt.names):
+                    self.uses_dispatcher = True
+            elif isinstance(stmt, ast.Expr):
+                # The common case (app.mount(...), app.include_router(...)) needs no walk
+                self._visit_call(stmt.value, stmt.end_lineno)
+            elif self._is_app_assignment(stmt):
+                self.app_line = stmt.end_lineno
+            elif isinstance(stmt, (ast.If, ast.With, ast.Try, ast.For)):
+                for node in ast.walk(stmt):
+                    self._visit_call(node, stmt.end_lineno)
+
+    def _visit_call(self, node, end_lineno):
+        target = _call_target(node)
+        if target is None:
+            return
+        if target == "static_app.register":
+            self.uses_dispatcher = True
+            self.last_mount = end_lineno
+            self.static_prefixes.add(_first_arg(node))
+        elif target == "app.mount":
+            self.last_mount = end_lineno
+            self.mount_paths.add(_first_arg(node))
+            if any(isinstance(arg, ast.Name) and arg.id == "static_app" for arg in node.args):
+                self.uses_dispatcher = True
+        elif target == "app.include_router":
+            self.last_router = end_lineno
+            self.routers.add(_first_arg(node))
+        elif target == "registry.install":
+            self.uses_registry = True
+
+    @staticmethod
+    def _is_app_assignment(stmt):
+        if not isinstance(stmt, ast.Assign) or not isinstance(stmt.value, ast.Call):
+            return False
+        func = stmt.value.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+        return name == "FastAPI" and any(
+            isinstance(target, ast.Name) and target.id == "app" for target in stmt.targets
+        )
+
+
+def _indentation(line):
+    return line[: len(line) - len(line.lstrip())]
 
-    import_line = f"import {feature_name}.routes as {feature_name}_routes\n"
-    static_line = f"app.mount('/static/{feature_name}', StaticFiles(directory='{feature_name}/static'), name='{feature_name}_static')\n"
-    router_line = f"app.include_router({feature_name}_routes.router)\n"
+
+def add_features_to_registry(registry_py, feature_names):
+    """
+    Append feature names to the FEATURES list in core/registry.py.
+
+    The list is edited in place: existing entries, comments and non-literal
+    items are kept, new names go right before the closing bracket.
+    """
+    with open(registry_py, "r") as f:
+        code = f.read()
+
+    for stmt in ast.parse(code, filename=registry_py).body:
+        if (
+            isinstance(stmt, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "FEATURES" for t in stmt.targets)
+            and isinstance(stmt.value, ast.List)
+        ):
+            break
+    else:
+        raise ValueError(f"{registry_py} has no `FEATURES = [...]` list")
+
+    elts = stmt.value.elts
+    known = {elt.value for elt in elts if isinstance(elt, ast.Constant)}
+    new_names = []
+    for feature_name in feature_names:
+        if feature_name not in known:
+            known.add(feature_name)
+            new_names.append(feature_name)
+    if not new_names:
+        return
+
+    # AST columns are UTF-8 byte offsets
+    lines = code.encode().splitlines(keepends=True)
+
+    def offset(lineno, col):
+        return sum(len(line) for line in lines[: lineno - 1]) + col
+
+    source = b"".join(lines)
+    closing = offset(stmt.value.end_lineno, stmt.value.end_col_offset - 1)
+    if elts:
+        last_end = offset(elts[-1].end_lineno, elts[-1].end_col_offset)
+        between = b"\n".join(line.split(b"#")[0] for line in source[last_end:closing].split(b"\n"))
+        needs_comma = b"," not in between
+    else:
+        last_end, needs_comma = None, False
+
+    bracket_line = lines[stmt.value.end_lineno - 1]
+    if not bracket_line[: stmt.value.end_col_offset - 1].strip():
+        # Multi-line list: one entry per line, indented like the last entry
+        if elts:
+            indent = _indentation(lines[elts[-1].lineno - 1])
+        else:
+            indent = _indentation(bracket_line) + b"    "
+        insert_at = closing - (stmt.value.end_col_offset - 1)
+        addition = b"".join(indent + f'"{name}",\n'.encode() for name in new_names)
+    else:
+        insert_at = closing
+        addition = ", ".join(f'"{name}"' for name in new_names).encode()
+        if elts and needs_comma:
+            addition = b", " + addition
+        elif elts:
+            addition = b" " + addition
+        needs_comma = False
+
+    if needs_comma:
+        source = source[:last_end] + b"," + source[last_end:insert_at] + addition + source[insert_at:]
+    else:
+        source = source[:insert_at] + addition + source[insert_at:]
+    write_atomic(registry_py, source.decode())
+
+
+def inject_features_to_main(app_dir, feature_names):
+    """Wire every feature into main.py with a single read, parse and write."""
+    main_py = os.path.join(app_dir, "main.py")
 
     with open(main_py, "r") as f:
-        lines = f.readlines()
+        code = f.read()
+    layout = MainLayout(ast.parse(code, filename=main_py))
 
-    # Insert import_line after the last import
-    last_import = max(
-        i
-        for i, line in enumerate(lines)
-        if line.strip().startswith(("import ", "from "))
-    )
-    if import_line not in lines:
-        lines.insert(last_import + 1, import_line)
-
-    # Insert static_line after the last app.mount (or after app = FastAPI())
-    mount_indices = [
-        i for i, line in enumerate(lines) if line.strip().startswith("app.mount")
-    ]
-    mount_insert_idx = (
-        mount_indices[-1] + 1
-        if mount_indices
-        else next(i for i, line in enumerate(lines) if "app = FastAPI()" in line) + 1
-    )
-    if static_line not in lines:
-        lines.insert(mount_insert_idx, static_line)
-
-    # Insert router_line after the last app.include_router (or after last mount)
-    router_indices = [
-        i
-        for i, line in enumerate(lines)
-        if line.strip().startswith("app.include_router")
-    ]
-    router_insert_idx = (
-        router_indices[-1] + 1 if router_indices else mount_insert_idx + 1
-    )
-    if router_line not in lines:
-        lines.insert(router_insert_idx, router_line)
-
-    # Deduplicate blank lines (optional: collapse >2 blank lines)
-    code = "".join(lines)
-    while "\n\n\n" in code:
-        code = code.replace("\n\n\n", "\n\n")
-    with open(main_py, "w") as f:
-        f.write(code)
+    # Projects using core/registry.py list features there instead of main.py
+    registry_py = os.path.join(app_dir, "core", "registry.py")
+    if layout.uses_registry and os.path.isfile(registry_py):
+        add_features_to_registry(registry_py, feature_names)
+        return
+
+    if layout.app_line is None:
+        raise ValueError(f"{main_py} has no `app = FastAPI()` to wire features into")
+
+    import_lines, static_lines, router_lines = [], [], []
+    for feature_name in feature_names:
+        alias = f"{feature_name}_routes"
+        if (f"{feature_name}.routes", alias) not in layout.imports:
+            layout.imports.add((f"{feature_name}.routes", alias))
+            import_lines.append(f"import {feature_name}.routes as {alias}\n")
+
+        # Register with the shared static dispatcher; projects scaffolded before
+        # core/staticfiles.py existed keep getting one mount per feature.
+        if layout.uses_dispatcher:
+            if feature_name not in layout.static_prefixes:
+                layout.static_prefixes.add(feature_name)
+                static_lines.append(
+                    f"static_app.register('{feature_name}', '{feature_name}/static')\n"
+                )
+        elif f"/static/{feature_name}" not in layout.mount_paths:
+            layout.mount_paths.add(f"/static/{feature_name}")
+            static_lines.append(
+                f"app.mount('/static/{feature_name}', StaticFiles(directory='{feature_name}/static'), name='{feature_name}_static')\n"
+            )
+
+        if alias not in layout.routers:
+            layout.routers.add(alias)
+            router_lines.append(f"app.include_router({alias}.router)\n")
+
+    # Imports after the last import, static lines after the last mount/register
+    # (or app = FastAPI()), routers after the last include_router (or the static lines).
+    mount_after = layout.last_mount or layout.app_line
+    router_after = layout.last_router or mount_after
+    insert_after = {}
+    insert_after.setdefault(layout.last_import, []).extend(import_lines)
+    insert_after.setdefault(mount_after, []).extend(static_lines)
+    insert_after.setdefault(router_after, []).extend(router_lines)
+
+    lines = code.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    out = list(insert_after.get(0, ()))
+    for lineno, line in enumerate(lines, start=1):
+        out.append(line)
+        out.extend(insert_after.get(lineno, ()))
+
+    # Collapse runs of blank lines (more than one empty line in a row)
+    code = re.sub(r"\n{3,}", "\n\n", "".join(out))
+    write_atomic(main_py, code)
@@ -0,0 +1,279 @@
+import importlib
+import importlib.util
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger("uvicorn.error")
+
+# Respawning a worker that died this quickly waits a bit, so a broken app
+# doesn't turn into a fork loop
+MIN_WORKER_LIFETIME = 1.0
+
+
+def _available(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop():
+    return "uvloop" if _available("uvloop") else "asyncio"
+
+
+def http_protocol():
+    return "httptools" if _available("httptools") else "h11"
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def bind_socket(host, port, reuse_port=False, backlog=2048):
+    """A listening TCP socket; with `reuse_port` every worker binds its own."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def import_app(app_path, app_dir="."):
+    """'main:app' -> the ASGI app, imported from `app_dir`."""
+    app_dir = os.path.abspath(app_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    module_name, _, attr = app_path.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "app")
+
+
+def per_process_stores(app_dir="."):
+    """
+    Settings of the app in `app_dir` that keep shared state in one process's
+    memory, e.g. ["SESSION_BACKEND=memory"]; such state is lost between workers.
+    """
+    app_dir = os.path.abspath(app_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    try:
+        settings = importlib.import_module("core.config").settings
+    except (ImportError, AttributeError):
+        return []
+    stores = []
+    if getattr(settings, "SESSION_BACKEND", None) == "memory":
+        stores.append("SESSION_BACKEND=memory")
+    if getattr(settings, "MESSAGE_STORAGE", None) == "server" and getattr(settings, "MESSAGE_BACKEND", None) == "memory":
+        stores.append("MESSAGE_BACKEND=memory")
+    return stores
+
+
+def dispose_engine():
+    """
+    Forget the pooled connections inherited from the parent process.
+
+    close=False leaves the parent's sockets alone; the worker's pool then
+    opens its own connections on first use.
+    """
+    database = sys.modules.get("core.database")
+    engine = getattr(database, "engine", None)
+    if engine is not None:
+        getattr(engine, "sync_engine", engine).dispose(close=False)
+
+
+def _make_server_class():
+    import uvicorn
+
+    class RecyclingServer(uvicorn.Server):
+        """uvicorn.Server that also exits once RSS grows past `max_memory` bytes."""
+
+        max_memory = 0
+
+        async def on_tick(self, counter):
+            if await super().on_tick(counter):
+                return True
+            # Ticks are 0.1s apart; check memory every 5 seconds
+            if self.max_memory and counter % 50 == 0:
+                rss = rss_bytes()
+                if rss > self.max_memory:
+                    logger.info(
+                        "Memory limit of %d MiB exceeded (%d MiB). Terminating process.",
+                        self.max_memory // 2**20,
+                        rss // 2**20,
+                    )
+                    return True
+            return False
+
+    return RecyclingServer
+
+
+class Arbiter:
+    """
+    Pre-fork process manager: imports the app once, forks `workers` uvicorn
+    servers and replaces any worker that exits (request/memory recycling or a
+    crash) until SIGINT/SIGTERM.
+    """
+
+    def __init__(
+        self,
+        app="main:app",
+        host="127.0.0.1",
+        port=8000,
+        workers=None,
+        preload=True,
+        max_requests=0,
+        max_requests_jitter=0,
+        max_memory=0,
+        graceful_timeout=30,
+        log_level="info",
+        app_dir=".",
+    ):
+        import uvicorn
+
+        self.workers = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_memory = max_memory
+        self.reuse_port = hasattr(socket, "SO_REUSEPORT")
+        self.children = {}
+        self.stopping = False
+
+        # Imported before forking, the app's modules and templates are shared
+        # copy-on-write by every worker; otherwise each worker imports it
+        target = import_app(app, app_dir) if preload else app
+        if not preload and os.path.abspath(app_dir) not in sys.path:
+            sys.path.insert(0, os.path.abspath(app_dir))
+        self.config = uvicorn.Config(
+            target,
+            host=host,
+            port=port,
+            loop=event_loop(),
+            http=http_protocol(),
+            log_level=log_level,
+            timeout_graceful_shutdown=graceful_timeout,
+        )
+        self.server_class = _make_server_class()
+        self.shared_socket = None
+
+    def run(self):
+        if self.reuse_port:
+            # Fail fast on a taken port; the workers bind their own sockets
+            bind_socket(self.host, self.port, reuse_port=True).close()
+        else:
+            self.shared_socket = bind_socket(self.host, self.port)
+
+        logger.info(
+            "Starting %d workers on http://%s:%d (loop=%s, http=%s, SO_REUSEPORT=%s)",
+            self.workers,
+            self.host,
+            self.port,
+            self.config.loop,
+            self.config.http,
+            "on" if self.reuse_port else "off",
+        )
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+            logger.info("Worker %d exited (code %s); starting a new one", pid, code)
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+        logger.info("All workers stopped")
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return pid
+        code = 0
+        try:
+            self.run_worker()
+        except BaseException:
+            logger.exception("Worker failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def run_worker(self):
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        random.seed()
+        dispose_engine()
+
+        if self.max_requests:
+            self.config.limit_max_requests = self.max_requests + random.randint(
+                0, self.max_requests_jitter
+            )
+        sock = self.shared_socket or bind_socket(self.host, self.port, reuse_port=True)
+        server = self.server_class(self.config)
+        server.max_memory = self.max_memory
+        server.run(sockets=[sock])
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def serve(
+    app="main:app",
+    host="127.0.0.1",
+    port=8000,
+    workers=None,
+    preload=True,
+    max_requests=0,
+    max_requests_jitter=0,
+    max_memory=0,
+    graceful_timeout=30,
+    log_level="info",
+    app_dir=".",
+):
+    """Run `app` under an Arbiter; platforms without fork() fall back to uvicorn's own workers."""
+    if hasattr(os, "fork"):
+        Arbiter(
+            app, host, port, workers, preload, max_requests, max_requests_jitter,
+            max_memory, graceful_timeout, log_level, app_dir,
+        ).run()
+        return
+
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        workers=workers or os.cpu_count() or 1,
+        limit_max_requests=max_requests or None,
+        timeout_graceful_shutdown=graceful_timeout,
+        log_level=log_level,
+        app_dir=app_dir,
+    )
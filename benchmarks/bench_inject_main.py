@@ -0,0 +1,62 @@
+"""
+inject_features_to_main on large synthetic main.py files.
+
+Builds main.py files with N existing features (about 3 lines per feature,
+so 1,667 features is a ~5,000-line file), then times injecting 1 and 30 new
+features. Time should grow linearly with file size.
+
+Usage:
+    python benchmarks/bench_inject_main.py [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers.feature_scaffold import inject_features_to_main  # noqa: E402
+
+
+def synthetic_main(features):
+    names = [f"feature{i}" for i in range(features)]
+    return "".join(
+        [
+            "from fastapi import FastAPI\n",
+            "from core.staticfiles import static_app\n",
+            *(f"import {name}.routes as {name}_routes\n" for name in names),
+            "\n\n\napp = FastAPI()\n",
+            'app.mount("/static", static_app, name="static")\n',
+            *(f"static_app.register('{name}', '{name}/static')\n" for name in names),
+            *(f"app.include_router({name}_routes.router)\n" for name in names),
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        main_py = os.path.join(tmp, "main.py")
+        for features in (333, 1667, 6667):
+            source = synthetic_main(features)
+            for batch in (1, 30):
+                new = [f"new{i}" for i in range(batch)]
+                best = float("inf")
+                for _ in range(args.repeat):
+                    with open(main_py, "w") as f:
+                        f.write(source)
+                    start = time.perf_counter()
+                    inject_features_to_main(tmp, new)
+                    best = min(best, time.perf_counter() - start)
+                lines = source.count("\n")
+                print(f"{lines:6d} lines, {batch:2d} new features: {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Login throughput under concurrent requests: sync vs. offloaded argon2.
+
+Scaffolds an app into a temp dir, imports its core/utils.py and simulates
+N concurrent logins, each verifying a password. While the logins run, a
+heartbeat task measures how long the event loop is blocked (a stand-in for
+every other page being rendered by the same worker).
+
+Usage:
+    python benchmarks/bench_password_hashing.py [--logins 64] [--workers 2]
+
+Requires the scaffolded app's dependencies (passlib[argon2], pydantic-settings,
+python-dotenv).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers.app_scaffold import create_app  # noqa: E402
+
+
+async def _heartbeat(stop, interval=0.005):
+    """Return the worst event-loop stall seen while `stop` is unset."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(login, logins):
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await heartbeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        create_app("benchapp")
+        sys.path.insert(0, os.path.join(tmp, "benchapp"))
+        os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+        os.environ.setdefault("SECRET_KEY", "bench")
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+        from core import utils
+
+        hashed = utils.hash_password("correct horse battery staple")
+
+        async def sync_login():
+            utils.verify_password("correct horse battery staple", hashed)
+
+        async def async_login():
+            await utils.verify_password_async("correct horse battery staple", hashed)
+
+        for label, login in [("sync", sync_login), ("async", async_login)]:
+            elapsed, stall = asyncio.run(_run(login, args.logins))
+            print(
+                f"{label:>5}: {args.logins / elapsed:8.1f} logins/s  "
+                f"total {elapsed * 1000:8.1f} ms  "
+                f"worst loop stall {stall * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
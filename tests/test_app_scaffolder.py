@@ -1,3 +1,4 @@
+import ast
 import os
 import sys
 from pathlib import Path
@@ -41,6 +42,18 @@ def test_create_app_creates_structure(tmp_project_dir):
         "decorators.py",
         "messages.py",
         "admin_loader.py",
+        "sessions.py",
+        "templates.py",
+        "render_cache.py",
+        "staticfiles.py",
+        "registry.py",
+        "migrations.py",
+        "metrics.py",
+        "nplusone.py",
+        "csrf.py",
+        "middleware.py",
+        "pagination.py",
+        "query_cache.py",
     ]:
         assert (app_dir / "core" / fname).exists()
 
@@ -55,7 +68,7 @@ def test_main_py_contains_fastapi_setup(tmp_project_dir):
     assert "FastAPI" in code
     assert "Request" in code
     assert "HTMLResponse" in code
-    assert "Jinja2Templates" in code
+    assert "from core.templates import templates" in code
     assert "SessionMiddleware" in code
     assert "def root" in code
     assert "TemplateResponse" in code
@@ -99,6 +112,48 @@ def test_database_file_defines_get_db(tmp_project_dir):
     assert "yield db" in code
 
 
+def test_database_file_uses_pool_settings(tmp_project_dir):
+    """core/database.py should size the pool from Settings."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "database.py").read_text()
+    config = (Path(app_name) / "core" / "config.py").read_text()
+
+    for name in [
+        "DB_POOL_SIZE",
+        "DB_MAX_OVERFLOW",
+        "DB_POOL_RECYCLE",
+        "DB_POOL_PRE_PING",
+    ]:
+        assert f"settings.{name}" in code
+        assert name in config
+
+
+def test_async_db_database_file_defines_async_get_db(tmp_project_dir):
+    """With async_db, core/database.py should use AsyncEngine/async_sessionmaker."""
+    app_name = "demoapp"
+    create_app(app_name, async_db=True)
+    code = (Path(app_name) / "core" / "database.py").read_text()
+
+    assert "create_async_engine" in code
+    assert "async_sessionmaker" in code
+    assert "AsyncSession" in code
+    assert "async def get_db" in code
+    assert "async with SessionLocal() as db" in code
+    assert "pool_pre_ping=settings.DB_POOL_PRE_PING" in code
+    assert "create_engine(" not in code.replace("create_async_engine(", "")
+
+
+@pytest.mark.parametrize("async_db", [False, True])
+def test_generated_python_files_are_valid(tmp_project_dir, async_db):
+    """Every scaffolded .py file should parse."""
+    app_name = "demoapp"
+    create_app(app_name, async_db=async_db)
+
+    for path in Path(app_name).rglob("*.py"):
+        ast.parse(path.read_text(), filename=str(path))
+
+
 def test_utils_contains_security_helpers(tmp_project_dir):
     """core/utils.py should contain password and CSRF helpers."""
     app_name = "demoapp"
@@ -116,6 +171,27 @@ def test_utils_contains_security_helpers(tmp_project_dir):
         assert keyword in code
 
 
+def test_utils_offloads_password_hashing(tmp_project_dir):
+    """core/utils.py should offer async argon2 helpers on a bounded executor."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "utils.py").read_text()
+    config = (Path(app_name) / "core" / "config.py").read_text()
+
+    assert "async def hash_password_async" in code
+    assert "async def verify_password_async" in code
+    assert "ThreadPoolExecutor(" in code
+    assert "asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)" in code
+    for name in [
+        "ARGON2_TIME_COST",
+        "ARGON2_MEMORY_COST",
+        "ARGON2_PARALLELISM",
+        "PASSWORD_HASH_WORKERS",
+    ]:
+        assert f"settings.{name}" in code
+        assert name in config
+
+
 def test_decorators_defines_login_required(tmp_project_dir):
     """core/decorators.py should define login_required decorator."""
     app_name = "demoapp"
@@ -128,6 +204,36 @@ def test_decorators_defines_login_required(tmp_project_dir):
     assert "get_user_model" in code
 
 
+def test_decorators_resolve_model_once_and_offload_lookup(tmp_project_dir):
+    """login_required should cache the model class and not block the event loop."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "decorators.py").read_text()
+
+    assert "@lru_cache(maxsize=None)\ndef get_user_model" in code
+    assert "run_in_threadpool(_load_user, user_id)" in code
+    assert "await get_user(user_id)" in code
+    assert "db.query(" not in code
+
+    for hook in ["class UserCache", "def invalidate_user", "def clear_user_cache", "def logout_user"]:
+        assert hook in code
+
+    config = (Path(app_name) / "core" / "config.py").read_text()
+    for name in ["AUTH_USER_MODEL", "LOGIN_URL", "USER_CACHE_TTL", "USER_CACHE_MAXSIZE"]:
+        assert name in config
+
+
+def test_async_db_decorators_use_async_session(tmp_project_dir):
+    """With async_db, the user lookup should await the async session."""
+    app_name = "demoapp"
+    create_app(app_name, async_db=True)
+    code = (Path(app_name) / "core" / "decorators.py").read_text()
+
+    assert "async with SessionLocal() as db" in code
+    assert "await db.get(get_user_model(), user_id)" in code
+    assert "_load_user" not in code
+
+
 def test_messages_module_has_add_and_pop_all(tmp_project_dir):
     """core/messages.py should define message queue helpers."""
     app_name = "demoapp"
@@ -138,6 +244,146 @@ def test_messages_module_has_add_and_pop_all(tmp_project_dir):
         assert fn in code
 
 
+def test_messages_are_buffered_and_saved_only_when_changed(tmp_project_dir):
+    """core/messages.py should buffer in request.state and offer a server-side storage."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "messages.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    for name in [
+        "class MessageBuffer",
+        "def encode(",
+        "class SessionMessageStorage",
+        "class ServerMessageStorage",
+        "class MessageMiddleware",
+        "buffer.changed",
+    ]:
+        assert name in code
+    # Added before the session middleware so it runs inside it
+    assert main.index("app.add_middleware(MessageMiddleware)") < main.index("SessionMiddleware, secret_key")
+    assert "MESSAGE_STORAGE" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_sessions_module_defines_server_side_backends(tmp_project_dir):
+    """core/sessions.py should provide dirty-tracked server-side sessions."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "sessions.py").read_text()
+
+    for name in [
+        "class Session(dict)",
+        "class SessionBackend",
+        "class MemorySessionBackend(SessionBackend)",
+        "class SQLSessionBackend(SessionBackend)",
+        "class ServerSessionMiddleware",
+        "def get_session_backend",
+        "async def purge_expired",
+    ]:
+        assert name in code
+    assert "secrets.token_urlsafe(32)" in code
+
+
+def test_main_py_selects_session_backend(tmp_project_dir):
+    """main.py should switch between cookie and server-side sessions."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "main.py").read_text()
+    config = (Path(app_name) / "core" / "config.py").read_text()
+    utils = (Path(app_name) / "core" / "utils.py").read_text()
+
+    assert 'settings.SESSION_BACKEND == "cookie"' in code
+    assert "ServerSessionMiddleware, backend=get_session_backend()" in code
+    assert "SESSION_BACKEND" in config
+    assert "SESSION_MAX_AGE" in config
+    assert "cycle_key()" in utils
+
+
+def test_templates_module_shares_one_cached_environment(tmp_project_dir):
+    """core/templates.py should build one environment with a bytecode cache."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "templates.py").read_text()
+    config = (Path(app_name) / "core" / "config.py").read_text()
+
+    assert "FileSystemLoader(template_dirs())" in code
+    assert "FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR)" in code
+    assert "auto_reload=settings.debug" in code
+    assert "Jinja2Templates(env=env)" in code
+    assert "def precompile" in code
+    assert "env.overlay(\n    enable_async=True," in code
+    assert "def stream_template" in code
+    assert "generate_async(context)" in code
+    assert "TEMPLATE_CACHE_DIR" in config
+    assert "def debug(self)" in config
+
+
+def test_render_cache_module_supports_pages_and_fragments(tmp_project_dir):
+    """core/render_cache.py should cache pages with ETags and template fragments."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "render_cache.py").read_text()
+    templates = (Path(app_name) / "core" / "templates.py").read_text()
+
+    for name in [
+        "class RenderCache",
+        "def invalidate_tags",
+        "def cache_page",
+        "class FragmentCacheExtension(Extension)",
+        'tags = {"cache"}',
+        "status_code=304",
+        "if-none-match",
+    ]:
+        assert name in code
+    assert "extensions=[FragmentCacheExtension]" in templates
+    assert "RENDER_CACHE_MAXSIZE" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_staticfiles_module_resolves_through_manifest(tmp_project_dir):
+    """core/staticfiles.py should resolve static() via the collectstatic manifest."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "staticfiles.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    assert "def static(path: str)" in code
+    assert "staticfiles.json" in code
+    assert "immutable" in code
+    assert 'env.globals["static"] = static' in (Path(app_name) / "core" / "templates.py").read_text()
+    assert "collected_root=settings.STATIC_ROOT if manifest else None" in code
+
+
+def test_main_py_mounts_single_static_dispatcher(tmp_project_dir):
+    """main.py should mount one StaticDispatcher instead of one StaticFiles per feature."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "staticfiles.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    assert "class StaticDispatcher" in code
+    assert "def register(self, prefix: str, directory: str)" in code
+    assert "self._metadata[path] = metadata" in code
+    assert "FileResponse(full_path, stat_result=stat_result" in code
+    assert 'app.mount("/static", static_app, name="static")' in main
+    assert "StaticFiles" not in main
+
+
+def test_registry_module_loads_features_lazily(tmp_project_dir):
+    """core/registry.py should list features and defer importing their routers."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "registry.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    assert "FEATURES = [\n]" in code
+    assert "class LazyFeatureMiddleware" in code
+    assert 'importlib.import_module(f"{name}.routes")' in code
+    assert "def report()" in code
+    assert 'if mode == "eager"' in code
+    assert "registry.install(app)" in main
+    assert "FEATURE_LOADING" in (Path(app_name) / "core" / "config.py").read_text()
+
+
 def test_admin_loader_registers_modelviews(tmp_project_dir):
     """core/admin_loader.py should have register_admin_views logic."""
     app_name = "demoapp"
@@ -147,3 +393,171 @@ def test_admin_loader_registers_modelviews(tmp_project_dir):
     assert "register_admin_views" in code
     assert "ModelView" in code
     assert "importlib" in code
+
+
+def test_admin_loader_uses_manifest_and_lazy_mount(tmp_project_dir):
+    """core/admin_loader.py should read the buildadmin manifest and mount lazily."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "admin_loader.py").read_text()
+
+    for name in [
+        "def discover_admin_views",
+        "def build_manifest",
+        "def load_manifest",
+        "class LazyAdmin",
+        "def mount_admin",
+        "if settings.debug:",
+    ]:
+        assert name in code
+    assert "from sqladmin import" not in code.split("def ")[0]
+    assert "ADMIN_MANIFEST" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_migrations_module_scopes_autogenerate_to_a_feature(tmp_project_dir):
+    """core/migrations.py should provide include filters and timing hooks for env.py."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "migrations.py").read_text()
+
+    for name in [
+        "def feature_tables",
+        "def alembic_options",
+        "on_version_apply",
+        "def backfill",
+        "autocommit_block()",
+        "def include_name",
+        "def include_object",
+        "process_revision_directives",
+        '"before_cursor_execute"',
+        'logging.getLogger("archonkit.migrations")',
+    ]:
+        assert name in code
+    assert "print(" not in code
+
+
+def test_metrics_module_is_optional_and_low_overhead(tmp_project_dir):
+    """core/metrics.py should expose Prometheus text and only be wired when enabled."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "metrics.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    for name in [
+        "class Histogram",
+        "__slots__",
+        "class MetricsMiddleware",
+        "def instrument_engine",
+        "def instrument_templates",
+        '"after_cursor_execute"',
+        "text/plain; version=0.0.4",
+    ]:
+        assert name in code
+    assert "if settings.METRICS_ENABLED:" in main
+    assert "METRICS_PATH" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_nplusone_detector_is_debug_only(tmp_project_dir):
+    """core/nplusone.py should group statements per request and only run in DEBUG."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "nplusone.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    for name in [
+        "class NPlusOneError(AssertionError)",
+        "class QueryLog",
+        "class NPlusOneMiddleware",
+        "def watch(",
+        "while rendering",
+        '"before_cursor_execute"',
+    ]:
+        assert name in code
+    assert "if settings.debug:\n    from core import nplusone" in main
+    assert "NPLUSONE_THRESHOLD" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_csrf_tokens_are_signed_and_stateless(tmp_project_dir):
+    """core/csrf.py should sign tokens with HMAC and only store a per-session nonce."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "csrf.py").read_text()
+    utils = (Path(app_name) / "core" / "utils.py").read_text()
+
+    for name in [
+        "def session_nonce",
+        "def make_token",
+        "def check_token",
+        "hmac.compare_digest",
+        "async def csrf_protect",
+        "class CSRFMiddleware",
+    ]:
+        assert name in code
+    assert 'request.session["csrf_token"]' not in utils
+    assert 'env.globals["csrf_token"] = csrf_token' in (Path(app_name) / "core" / "templates.py").read_text()
+    assert "if settings.CSRF_MIDDLEWARE:" in (Path(app_name) / "main.py").read_text()
+
+
+def test_middleware_module_compresses_and_answers_conditional_gets(tmp_project_dir):
+    """core/middleware.py should negotiate gzip/brotli and add weak validators to HTML."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "middleware.py").read_text()
+    main = (Path(app_name) / "main.py").read_text()
+
+    for name in [
+        "def choose_encoding",
+        "class CompressionMiddleware",
+        "zlib.Z_SYNC_FLUSH",
+        "class ConditionalGetMiddleware",
+        'W/"%s"',
+        "private, no-cache",
+    ]:
+        assert name in code
+    # Compression is added last so it wraps the conditional layer
+    assert main.index("app.add_middleware(ConditionalGetMiddleware)") < main.index(
+        "app.add_middleware(CompressionMiddleware)"
+    )
+    assert "COMPRESSION_MIN_SIZE" in (Path(app_name) / "core" / "config.py").read_text()
+
+
+def test_pagination_module_uses_keyset_cursors(tmp_project_dir):
+    """core/pagination.py should seek on the sort key and ship pager macros."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "pagination.py").read_text()
+    macros = (Path(app_name) / "templates" / "pagination.html").read_text()
+
+    for name in [
+        "class InvalidCursor(ValueError)",
+        "def encode_cursor",
+        "def decode_cursor",
+        "def _seek",
+        "tuple_(*columns)",
+        "EXPLAIN (FORMAT JSON)",
+        "async def paginate_async",
+    ]:
+        assert name in code
+    assert ".offset(" not in code
+    assert "{% macro pager(page, request" in macros
+    assert 'env.globals["page_url"] = page_url' in (Path(app_name) / "core" / "templates.py").read_text()
+
+
+def test_query_cache_module_invalidates_on_commit(tmp_project_dir):
+    """core/query_cache.py should cache opted-in selects and hook commit events."""
+    app_name = "demoapp"
+    create_app(app_name)
+    code = (Path(app_name) / "core" / "query_cache.py").read_text()
+
+    for name in [
+        "class QueryCacheBackend",
+        "class FromCache(UserDefinedOption)",
+        "def cached(",
+        "def cached_query(",
+        '@event.listens_for(Session, "do_orm_execute")',
+        '@event.listens_for(Session, "after_commit")',
+        "merge_frozen_result",
+    ]:
+        assert name in code
+    assert "from core import query_cache" in (Path(app_name) / "core" / "database.py").read_text()
+    assert "QUERY_CACHE_BACKEND" in (Path(app_name) / "core" / "config.py").read_text()
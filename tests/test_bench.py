@@ -0,0 +1,52 @@
+import ast
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure imports work from project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers.bench import SCENARIOS, compare_results, scaffold_bench_app  # noqa: E402
+
+
+@pytest.fixture
+def tmp_project_dir(tmp_path):
+    """Creates isolated directory for tests."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(cwd)
+
+
+def test_scaffold_bench_app_wires_every_scenario(tmp_project_dir):
+    """The throwaway app should define a route for every scenario request."""
+    app_dir = Path(scaffold_bench_app(str(tmp_project_dir)))
+
+    assert os.getcwd() == str(tmp_project_dir)
+    routes = (app_dir / "pages" / "routes.py").read_text()
+    ast.parse(routes)
+    ast.parse((app_dir / "users" / "models.py").read_text())
+    for scenario in SCENARIOS.values():
+        for method, path in scenario["requests"]:
+            if path.startswith("/pages/"):
+                route = path[len("/pages"):]
+                assert f'@router.{method.lower()}("{route}"' in routes
+    assert "sqlite:///./bench.db" in (app_dir / ".env").read_text()
+    assert (app_dir / "pages" / "templates" / "pages" / "form.html").exists()
+
+
+def test_compare_results_reports_relative_change():
+    """Each shared scenario should be reported as a percentage change."""
+    previous = {"results": {"root": {"rps": 100.0, "p50_ms": 2.0, "p99_ms": 4.0}}}
+    current = {
+        "results": {
+            "root": {"rps": 150.0, "p50_ms": 1.0, "p99_ms": 4.0},
+            "csrf_form": {"rps": 10.0, "p50_ms": 1.0, "p99_ms": 1.0},
+        }
+    }
+
+    assert compare_results(previous, current) == [
+        "root             rps +50.0%  p50_ms -50.0%  p99_ms +0.0%"
+    ]
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("click")
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Imports that dominate startup time; no command listing or keygen needs them
+HEAVY_MODULES = ["alembic", "sqlalchemy", "fastapi", "starlette", "uvicorn", "jinja2", "httpx"]
+
+
+def run_cli(*args):
+    """Run the CLI in a fresh interpreter and return its stdout."""
+    result = subprocess.run(
+        [sys.executable, "-m", "archonkit.cli", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def loaded_modules(*args):
+    """Modules imported after dispatching `archonkit <args>`."""
+    code = (
+        "import sys\n"
+        "from archonkit.cli import archonkit\n"
+        f"archonkit.main({list(args)!r}, standalone_mode=False)\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    # The last line; anything before it is the command's own output
+    return set(result.stdout.splitlines()[-1].split())
+
+
+@pytest.mark.parametrize("args", [("--help",), ("keygen",)])
+def test_cli_does_not_import_heavy_modules(args):
+    """Commands that don't need them shouldn't load Alembic, SQLAlchemy or the web stack."""
+    modules = loaded_modules(*args)
+
+    for name in HEAVY_MODULES:
+        assert name not in modules
+    assert "archonkit.commands.migrations" not in modules
+
+
+def test_help_lists_every_command():
+    """--help should list lazy commands without importing them."""
+    output = run_cli("--help")
+
+    for name in [
+        "new",
+        "feature",
+        "keygen",
+        "compiletemplates",
+        "collectstatic",
+        "startupreport",
+        "buildadmin",
+        "serve",
+        "bench",
+        "makemigrations",
+        "migrate",
+        "rollback",
+    ]:
+        assert name in output
+
+
+def test_lazy_help_matches_command_docstrings():
+    """--help before and after importing every command should read the same."""
+    code = (
+        "import click\n"
+        "from archonkit.cli import archonkit\n"
+        "ctx = click.Context(archonkit)\n"
+        "for name in archonkit.list_commands(ctx):\n"
+        "    archonkit.get_command(ctx, name)\n"
+        "archonkit.main(['--help'], prog_name='archonkit')\n"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    lazy = subprocess.run(
+        [sys.executable, "-c", "from archonkit.cli import archonkit\narchonkit.main(['--help'], prog_name='archonkit')"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert lazy == loaded
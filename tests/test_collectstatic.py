@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure imports work from project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers.collectstatic import collect_static, hashed_name  # noqa: E402
+
+
+@pytest.fixture
+def tmp_project_dir(tmp_path):
+    """Creates isolated directory for tests."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(cwd)
+
+
+def write_static(project_dir, feature_name, relative, content):
+    path = project_dir / feature_name / "static" / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_hashed_name_uses_content_hash():
+    """Same content should give the same name; different content a different one."""
+    first = hashed_name("users/app.css", b"body{}")
+
+    assert first.startswith("users/app.")
+    assert first.endswith(".css")
+    assert first == hashed_name("users/app.css", b"body{}")
+    assert first != hashed_name("users/app.css", b"body{color:red}")
+
+
+def test_collect_static_writes_manifest_and_hashed_files(tmp_project_dir):
+    """Every feature's static files should be copied and listed in the manifest."""
+    write_static(tmp_project_dir, "users", "app.css", b"body{}")
+    write_static(tmp_project_dir, "blog", "js/app.js", b"console.log(1)")
+
+    manifest = collect_static(".", "staticfiles")
+
+    out = tmp_project_dir / "staticfiles"
+    assert set(manifest) == {"users/app.css", "blog/js/app.js"}
+    assert json.loads((out / "staticfiles.json").read_text()) == manifest
+    for original, hashed in manifest.items():
+        assert (out / original).exists()
+        assert (out / hashed).exists()
+
+
+def test_collect_static_precompresses_only_when_smaller(tmp_project_dir):
+    """gzip variants should exist for compressible files that shrink."""
+    css = b"body { color: red; }\n" * 200
+    write_static(tmp_project_dir, "users", "app.css", css)
+    write_static(tmp_project_dir, "users", "tiny.css", b"a{}")
+    write_static(tmp_project_dir, "users", "logo.png", b"\x89PNG" * 500)
+
+    manifest = collect_static(".", "staticfiles")
+
+    out = tmp_project_dir / "staticfiles"
+    gz = out / (manifest["users/app.css"] + ".gz")
+    assert gzip.decompress(gz.read_bytes()) == css
+    assert not (out / "users" / "tiny.css.gz").exists()
+    assert not (out / "users" / "logo.png.gz").exists()
+
+
+def test_collect_static_can_skip_compression(tmp_project_dir):
+    """compress=False should only copy files."""
+    write_static(tmp_project_dir, "users", "app.css", b"body { color: red; }\n" * 200)
+
+    collect_static(".", "staticfiles", compress=False)
+
+    assert not list((tmp_project_dir / "staticfiles").rglob("*.gz"))
+
+
+def test_collect_static_prunes_files_from_previous_runs(tmp_project_dir):
+    """Old hashed names and their variants should go once the source changes."""
+    write_static(tmp_project_dir, "users", "app.css", b"body { color: red; }\n" * 200)
+    old = collect_static(".", "staticfiles")["users/app.css"]
+    (tmp_project_dir / "staticfiles" / "notes.txt").write_text("kept")
+
+    write_static(tmp_project_dir, "users", "app.css", b"body { color: blue; }\n" * 200)
+    new = collect_static(".", "staticfiles")["users/app.css"]
+
+    out = tmp_project_dir / "staticfiles"
+    assert old != new
+    assert not (out / old).exists()
+    assert not (out / (old + ".gz")).exists()
+    assert (out / new).exists()
+    assert (out / "notes.txt").read_text() == "kept"
+
+
+def test_collect_static_skips_its_own_output(tmp_project_dir):
+    """An output tree that happens to contain static/ is not a feature."""
+    write_static(tmp_project_dir, "users", "app.css", b"body{}")
+    write_static(tmp_project_dir, "public", "stale.css", b"a{}")
+
+    manifest = collect_static(".", "public")
+
+    assert set(manifest) == {"users/app.css"}
@@ -8,7 +8,13 @@ import pytest
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from archonkit.helpers.feature_scaffold import create_feature  # noqa: E402
-from archonkit.helpers.feature_scaffold import inject_feature_to_main
+from archonkit.helpers.feature_scaffold import (
+    add_features_to_registry,
+    create_features,
+    inject_feature_to_main,
+    inject_features_to_main,
+    write_atomic,
+)
 
 
 @pytest.fixture
@@ -112,7 +118,7 @@ def test_routes_py_has_fastapi_boilerplate(tmp_project_dir):
     content = routes_py.read_text()
 
     assert "from fastapi import APIRouter" in content
-    assert "Jinja2Templates" in content
+    assert "from core.templates import templates" in content
     assert f'prefix="/{feature_name}"' in content
     assert f'tags=["{feature_name}"]' in content
 
@@ -128,9 +134,22 @@ def test_routes_py_has_root_endpoint(tmp_project_dir):
     assert '@router.get("/", response_class=HTMLResponse)' in content
     assert "async def feature_root(request: Request):" in content
     assert "templates.TemplateResponse" in content
+    assert f'"{feature_name}/index.html"' in content
     assert f"Welcome to {feature_name}!" in content
 
 
+def test_routes_py_streaming_option(tmp_project_dir):
+    """streaming=True should render the root page with stream_template."""
+    feature_name = "reports"
+    create_feature(feature_name, streaming=True)
+
+    content = (tmp_project_dir / feature_name / "routes.py").read_text()
+
+    assert "from core.templates import stream_template" in content
+    assert f'return stream_template(request, "{feature_name}/index.html"' in content
+    assert "TemplateResponse" not in content
+
+
 def test_base_html_has_jinja_blocks(tmp_project_dir):
     """base.html should contain title and content blocks."""
     feature_name = "products"
@@ -178,6 +197,41 @@ def test_create_feature_is_idempotent(tmp_project_dir):
     assert first_content == second_content
 
 
+def test_create_features_scaffolds_every_feature(tmp_project_dir):
+    """create_features should build each feature tree."""
+    names = [f"feature{i}" for i in range(12)]
+    create_features(names)
+
+    for name in names:
+        assert (tmp_project_dir / name / "routes.py").exists()
+        assert (tmp_project_dir / name / "templates" / name / "index.html").exists()
+        assert f'prefix="/{name}"' in (tmp_project_dir / name / "routes.py").read_text()
+
+
+def test_write_atomic_replaces_without_leftovers(tmp_project_dir):
+    """write_atomic should overwrite the target and leave no temp files."""
+    target = tmp_project_dir / "file.txt"
+    target.write_text("old")
+
+    write_atomic(str(target), "new")
+
+    assert target.read_text() == "new"
+    assert [p.name for p in tmp_project_dir.iterdir()] == ["file.txt"]
+    assert oct(target.stat().st_mode & 0o777) != oct(0o600)
+
+
+def test_write_atomic_applies_umask_without_changing_it(tmp_project_dir):
+    """Files get 0666 minus the umask, and the process umask is never touched."""
+    previous = os.umask(0o027)
+    try:
+        write_atomic(str(tmp_project_dir / "file.txt"), "content")
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(previous)
+
+    assert (tmp_project_dir / "file.txt").stat().st_mode & 0o777 == 0o640
+
+
 # ---------------------------------------------------------
 #  TESTS FOR inject_feature_to_main()
 # ---------------------------------------------------------
@@ -359,3 +413,186 @@ def test_inject_feature_collapses_excessive_blank_lines(tmp_project_dir):
 
     # Should not have 3+ consecutive newlines
     assert "\n\n\n" not in content
+
+
+def test_inject_feature_registers_with_static_dispatcher(tmp_project_dir):
+    """With a static_app in main.py, features should register instead of mounting."""
+    app_dir = tmp_project_dir / "demoapp"
+    app_dir.mkdir()
+    main_py = app_dir / "main.py"
+
+    main_py.write_text(
+        "from fastapi import FastAPI\n"
+        "from core.staticfiles import static_app\n\n"
+        "app = FastAPI()\n"
+        "app.mount(\"/static\", static_app, name=\"static\")\n"
+    )
+
+    inject_feature_to_main(app_dir, "users")
+    inject_feature_to_main(app_dir, "blog")
+    inject_feature_to_main(app_dir, "blog")
+
+    content = main_py.read_text()
+    assert "app.mount('/static/" not in content
+    assert content.count("static_app.register('blog', 'blog/static')") == 1
+
+    mount_idx = content.index('app.mount("/static", static_app')
+    users_idx = content.index("static_app.register('users', 'users/static')")
+    blog_idx = content.index("static_app.register('blog', 'blog/static')")
+    router_idx = content.index("app.include_router(users_routes.router)")
+    assert mount_idx < users_idx < blog_idx < router_idx
+
+
+def test_inject_features_applies_all_in_one_pass(tmp_project_dir):
+    """inject_features_to_main should wire many features in order, without duplicates."""
+    app_dir = tmp_project_dir / "demoapp"
+    app_dir.mkdir()
+    main_py = app_dir / "main.py"
+
+    main_py.write_text(
+        "from fastapi import FastAPI\n"
+        "from fastapi.staticfiles import StaticFiles\n\n"
+        "app = FastAPI()\n"
+    )
+
+    inject_features_to_main(app_dir, ["users", "blog", "users"])
+    inject_features_to_main(app_dir, ["blog", "shop"])
+
+    content = main_py.read_text()
+    for name in ["users", "blog", "shop"]:
+        assert content.count(f"import {name}.routes as {name}_routes") == 1
+        assert content.count(f"app.mount('/static/{name}'") == 1
+        assert content.count(f"app.include_router({name}_routes.router)") == 1
+
+    assert (
+        content.index("import users.routes")
+        < content.index("import blog.routes")
+        < content.index("import shop.routes")
+        < content.index("app.mount('/static/users'")
+        < content.index("app.mount('/static/shop'")
+        < content.index("app.include_router(users_routes.router)")
+        < content.index("app.include_router(shop_routes.router)")
+    )
+
+
+def test_inject_feature_places_lines_after_multiline_statements(tmp_project_dir):
+    """Insertions should land after whole statements, not inside them."""
+    app_dir = tmp_project_dir / "demoapp"
+    app_dir.mkdir()
+    main_py = app_dir / "main.py"
+
+    main_py.write_text(
+        "from fastapi import (\n"
+        "    FastAPI,\n"
+        ")\n"
+        "from fastapi.staticfiles import StaticFiles\n\n"
+        "app = FastAPI(\n"
+        "    title='demo',\n"
+        ")\n"
+        "app.include_router(\n"
+        "    auth_routes.router,\n"
+        ")\n"
+    )
+
+    inject_feature_to_main(app_dir, "users")
+
+    content = main_py.read_text()
+    compile(content, "main.py", "exec")
+    assert content.index("    title='demo',\n)\n") < content.index(
+        "app.mount('/static/users'"
+    )
+    assert content.endswith("    auth_routes.router,\n)\napp.include_router(users_routes.router)\n")
+
+
+def test_inject_feature_handles_large_main_py(tmp_project_dir):
+    """A ~5,000-line main.py should be handled in one parse, without duplicates."""
+    app_dir = tmp_project_dir / "demoapp"
+    app_dir.mkdir()
+    main_py = app_dir / "main.py"
+
+    names = [f"feature{i}" for i in range(1667)]
+    main_py.write_text(
+        "from fastapi import FastAPI\n"
+        "from core.staticfiles import static_app\n"
+        + "".join(f"import {n}.routes as {n}_routes\n" for n in names)
+        + "\n" * 50
+        + "app = FastAPI()\n"
+        + 'app.mount("/static", static_app, name="static")\n'
+        + "".join(f"static_app.register('{n}', '{n}/static')\n" for n in names)
+        + "".join(f"app.include_router({n}_routes.router)\n" for n in names)
+    )
+
+    inject_features_to_main(app_dir, ["feature10", "extra"])
+
+    content = main_py.read_text()
+    assert "\n\n\n" not in content
+    assert content.count("import feature10.routes") == 1
+    assert content.count("static_app.register('extra'") == 1
+    assert content.rstrip().endswith("app.include_router(extra_routes.router)")
+
+
+def test_inject_feature_uses_registry_when_present(tmp_project_dir):
+    """With registry.install(app) in main.py, features go into core/registry.py."""
+    app_dir = tmp_project_dir / "demoapp"
+    (app_dir / "core").mkdir(parents=True)
+    main_py = app_dir / "main.py"
+    registry_py = app_dir / "core" / "registry.py"
+
+    main_source = (
+        "from fastapi import FastAPI\n"
+        "from core import registry\n\n"
+        "app = FastAPI()\n"
+        "registry.install(app)\n"
+    )
+    main_py.write_text(main_source)
+    registry_py.write_text("import os\n\nFEATURES = [\n]\n\nload_times = {}\n")
+
+    inject_features_to_main(app_dir, ["users", "blog"])
+    inject_feature_to_main(app_dir, "users")
+    inject_feature_to_main(app_dir, "shop")
+
+    assert main_py.read_text() == main_source
+    assert registry_py.read_text() == (
+        "import os\n\n"
+        'FEATURES = [\n    "users",\n    "blog",\n    "shop",\n]\n\n'
+        "load_times = {}\n"
+    )
+
+
+def test_add_features_to_registry_keeps_comments_and_expressions(tmp_project_dir):
+    """Hand-edited FEATURES entries survive; new names go before the bracket."""
+    registry_py = tmp_project_dir / "registry.py"
+    registry_py.write_text(
+        "FEATURES = [\n"
+        '    "users",  # accounts\n'
+        "    *PLUGINS,\n"
+        '    "blog"  # posts\n'
+        "]\n"
+    )
+
+    add_features_to_registry(str(registry_py), ["users", "shop"])
+
+    assert registry_py.read_text() == (
+        "FEATURES = [\n"
+        '    "users",  # accounts\n'
+        "    *PLUGINS,\n"
+        '    "blog",  # posts\n'
+        '    "shop",\n'
+        "]\n"
+    )
+
+
+@pytest.mark.parametrize("name", ["bad-name", "2fa", "class"])
+def test_feature_command_rejects_names_that_are_not_packages(tmp_project_dir, name):
+    """Names that can't be imported are refused before anything is written."""
+    from click.testing import CliRunner
+
+    from archonkit.commands.scaffold import feature
+
+    (tmp_project_dir / "main.py").write_text("from fastapi import FastAPI\n\napp = FastAPI()\n")
+
+    result = CliRunner().invoke(feature, ["users", name, "--app-dir", "."])
+
+    assert result.exit_code == 2
+    assert "not a valid Python package name" in result.output
+    assert sorted(p.name for p in tmp_project_dir.iterdir()) == ["main.py"]
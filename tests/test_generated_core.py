@@ -0,0 +1,383 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure package import works
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers.app_scaffold import create_app  # noqa: E402
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+
+def _forget_generated_modules():
+    for name in list(sys.modules):
+        if name in ("core", "main") or name.startswith("core."):
+            del sys.modules[name]
+
+
+@pytest.fixture
+def generated_app(tmp_path, monkeypatch):
+    """Scaffold an app and make its `core` package importable; yields the app dir."""
+    monkeypatch.chdir(tmp_path)
+    create_app("demoapp")
+    app_dir = tmp_path / "demoapp"
+    monkeypatch.chdir(app_dir)
+    monkeypatch.syspath_prepend(str(app_dir))
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///./app.db")
+    monkeypatch.setenv("SECRET_KEY", "test-secret")
+    monkeypatch.setenv("DEBUG", "false")
+    _forget_generated_modules()
+    yield app_dir
+    query_cache = sys.modules.get("core.query_cache")
+    if query_cache is not None:
+        # Session events are global; don't leak this app's listeners into other tests
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        for identifier, fn in [
+            ("do_orm_execute", query_cache._do_orm_execute),
+            ("after_flush", query_cache._after_flush),
+            ("after_commit", query_cache._after_commit),
+            ("after_rollback", query_cache._after_rollback),
+        ]:
+            event.remove(Session, identifier, fn)
+    _forget_generated_modules()
+
+
+def test_query_cache_invalidated_by_bulk_insert(generated_app):
+    """A cached count should change once a bulk INSERT is committed."""
+    from sqlalchemy import Column, Integer, String, func, insert, select
+
+    from core.database import Base, SessionLocal, engine
+    from core.query_cache import cached
+
+    class Cat(Base):
+        __tablename__ = "cats"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(50))
+
+    Base.metadata.create_all(engine)
+    count = select(func.count()).select_from(Cat).options(cached(ttl=60))
+    with SessionLocal() as db:
+        assert db.execute(count).scalar() == 0
+        db.execute(insert(Cat), [{"name": "Tom"}, {"name": "Felix"}])
+        db.commit()
+        assert db.execute(count).scalar() == 2
+    engine.dispose()
+
+
+def test_csrf_exempt_prefix_stops_at_path_boundary(generated_app):
+    """CSRF_EXEMPT="/admin" should cover /admin/... but not /administrator."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette.middleware.sessions import SessionMiddleware
+
+    from core.csrf import CSRFMiddleware
+
+    app = FastAPI()
+
+    @app.post("/admin/users")
+    @app.post("/administrator")
+    async def save():
+        return {"ok": True}
+
+    app.add_middleware(CSRFMiddleware, exempt=["/admin"])
+    app.add_middleware(SessionMiddleware, secret_key="test-secret")
+    client = TestClient(app)
+
+    assert client.post("/admin/users").status_code == 200
+    assert client.post("/administrator").status_code == 403
+
+
+@pytest.fixture
+def middleware_client(generated_app):
+    """TestClient for an app wrapped like main.py: ConditionalGet inside Compression."""
+    from fastapi import FastAPI
+    from fastapi.responses import HTMLResponse
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.testclient import TestClient
+
+    from core.middleware import CompressionMiddleware, ConditionalGetMiddleware
+
+    static_dir = generated_app / "assets"
+    static_dir.mkdir()
+    (static_dir / "app.css").write_text("body { color: red; }\n" * 200)
+
+    app = FastAPI()
+    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+
+    @app.get("/page", response_class=HTMLResponse)
+    async def page():
+        return "<p>hello</p>" * 200
+
+    @app.get("/small", response_class=HTMLResponse)
+    async def small():
+        return "<p>hi</p>"
+
+    @app.get("/tagged")
+    async def tagged():
+        return HTMLResponse("<p>tagged</p>" * 200, headers={"ETag": '"v1"'})
+
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def test_conditional_get_answers_matching_etag_with_304(middleware_client):
+    """A repeated GET with If-None-Match should get a bodiless 304."""
+    first = middleware_client.get("/page")
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert "last-modified" not in first.headers
+
+    second = middleware_client.get("/page", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+def test_compression_skips_bodies_below_minimum_size(middleware_client):
+    response = middleware_client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "<p>hi</p>"
+
+
+def test_compression_weakens_strong_etag(middleware_client):
+    response = middleware_client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "Accept-Encoding" in response.headers["vary"]
+
+
+def test_compression_leaves_file_responses_alone(middleware_client):
+    """Uncollected static files keep their Content-Length and byte ranges."""
+    response = middleware_client.get("/static/app.css", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == str(len(response.content))
+
+
+def test_static_dispatcher_honours_accept_encoding_q_values(generated_app):
+    """A precompressed variant refused with q=0 should not be served."""
+    import gzip
+
+    from fastapi.testclient import TestClient
+
+    from core.staticfiles import StaticDispatcher
+
+    collected = generated_app / "collected"
+    (collected / "users").mkdir(parents=True)
+    css = b"body { color: red; }\n" * 200
+    (collected / "users" / "app.css").write_bytes(css)
+    (collected / "users" / "app.css.gz").write_bytes(gzip.compress(css))
+    client = TestClient(StaticDispatcher(collected_root=str(collected)))
+
+    refused = client.get("/users/app.css", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    accepted = client.get("/users/app.css", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in refused.headers
+    assert refused.content == css
+    assert accepted.headers["content-encoding"] == "gzip"
+    assert accepted.content == css
+
+
+def test_server_message_storage_purges_abandoned_messages(generated_app):
+    """Messages that are never popped should not outlive their expiry."""
+    import asyncio
+
+    from core.messages import ServerMessageStorage
+    from core.sessions import MemorySessionBackend
+
+    backend = MemorySessionBackend()
+    storage = ServerMessageStorage(backend=backend, max_age=-1)
+
+    async def flash_then_abandon():
+        await storage.save({}, [[2, "Saved"]])
+        assert len(backend._data) == 1
+        await storage.load({})
+
+    asyncio.run(flash_then_abandon())
+    assert backend._data == {}
+
+
+def test_cache_page_replays_handler_headers(generated_app):
+    """Cached pages keep the handler's headers but never its cookies."""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse
+    from fastapi.testclient import TestClient
+
+    from core.render_cache import cache_page
+
+    app = FastAPI()
+    renders = []
+
+    @app.get("/report")
+    @cache_page(ttl=60)
+    async def report(request: Request):
+        renders.append(1)
+        response = HTMLResponse("<p>report</p>", headers={"Cache-Control": "max-age=30", "X-Report": "1"})
+        response.set_cookie("seen", "1")
+        return response
+
+    client = TestClient(app)
+    first = client.get("/report")
+    second = client.get("/report")
+
+    assert len(renders) == 1
+    assert second.headers["cache-control"] == "max-age=30"
+    assert second.headers["x-report"] == "1"
+    assert second.headers["content-type"].startswith("text/html")
+    assert "set-cookie" in first.headers
+    assert "set-cookie" not in second.headers
+
+
+def test_cache_page_requires_request_parameter(generated_app):
+    from core.render_cache import cache_page
+
+    with pytest.raises(TypeError, match="request"):
+
+        @cache_page()
+        async def report():
+            return "<p>report</p>"
+
+
+def test_keyless_fragments_do_not_share_a_cache_entry(generated_app):
+    from jinja2 import DictLoader, Environment
+
+    from core.render_cache import FragmentCacheExtension
+
+    env = Environment(
+        loader=DictLoader({"page.html": "{% cache %}one{% endcache %}|{% cache %}two{% endcache %}"}),
+        extensions=[FragmentCacheExtension],
+    )
+
+    assert env.get_template("page.html").render() == "one|two"
+
+
+@pytest.fixture
+def streaming_form_app(generated_app):
+    """A CSRF-protected app whose form page is rendered with stream_template."""
+    from fastapi import FastAPI, Request
+
+    (generated_app / "templates" / "form.html").write_text(
+        '<html><head></head><body><form method="post">'
+        '<input type="hidden" name="csrf_token" value="{{ csrf_token(request) }}">'
+        "</form></body></html>"
+    )
+    from core.csrf import CSRFMiddleware
+    from core.sessions import CookieSessionMiddleware
+    from core.templates import stream_template
+
+    app = FastAPI()
+
+    @app.get("/form")
+    async def form(request: Request):
+        return stream_template(request, "form.html")
+
+    @app.post("/form")
+    async def save():
+        return {"ok": True}
+
+    @app.get("/late")
+    async def late(request: Request):
+        from fastapi.responses import StreamingResponse
+
+        async def body():
+            yield "<p>"
+            request.session["user_id"] = 1
+            yield "</p>"
+
+        return StreamingResponse(body(), media_type="text/html")
+
+    app.add_middleware(CSRFMiddleware, exempt=[])
+    app.add_middleware(CookieSessionMiddleware, secret_key="test-secret")
+    return app
+
+
+def test_streamed_form_posts_back_on_a_fresh_session(streaming_form_app):
+    """The CSRF nonce must reach the session before the streamed body renders."""
+    import re
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(streaming_form_app)
+    page = client.get("/form").text
+    token = re.search(r'name="csrf_token" value="([^"]+)"', page).group(1)
+
+    assert client.post("/form", data={"csrf_token": token}).status_code == 200
+
+
+def test_session_writes_after_response_start_raise(streaming_form_app):
+    from fastapi.testclient import TestClient
+
+    with pytest.raises(RuntimeError, match="after the response started"):
+        TestClient(streaming_form_app).get("/late")
+
+
+def test_nplusone_watch_raises_through_the_middleware(generated_app):
+    """The documented `with watch(..., raise_error=True): client.get(...)` pattern should raise."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    from core import nplusone
+    from core.database import SessionLocal, engine
+
+    nplusone.instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/users/")
+    def user_list():
+        with SessionLocal() as db:
+            for user_id in range(5):
+                db.execute(text("SELECT :id"), {"id": user_id})
+        return {"ok": True}
+
+    app.add_middleware(nplusone.NPlusOneMiddleware)
+    client = TestClient(app)
+    try:
+        with pytest.raises(nplusone.NPlusOneError, match="SELECT"):
+            with nplusone.watch("user list", threshold=3, raise_error=True):
+                client.get("/users/")
+    finally:
+        from sqlalchemy import event
+
+        event.remove(engine, "before_cursor_execute", nplusone._before_cursor_execute)
+        engine.dispose()
+
+
+def test_metrics_time_streamed_templates(generated_app):
+    """Pages rendered with stream_template should show up in the template histogram."""
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+
+    (generated_app / "templates" / "streamed.html").write_text("<html><head></head><body>hi</body></html>")
+    from core import metrics
+    from core.templates import async_env, env, stream_template
+
+    metrics.instrument_templates(env, async_env)
+    app = FastAPI()
+
+    @app.get("/streamed")
+    async def streamed(request: Request):
+        return stream_template(request, "streamed.html")
+
+    assert TestClient(app).get("/streamed").text.endswith("hi</body></html>")
+    assert metrics.templates["streamed.html"].count == 1
+    assert 'archon_template_render_seconds_count{template="streamed.html"} 1' in metrics.render()
+
+
+def test_join_path_sees_templates_added_while_reloading(generated_app, monkeypatch):
+    """In DEBUG, a feature template created after a lookup missed should be found."""
+    monkeypatch.setenv("DEBUG", "true")
+    (generated_app / "blog" / "templates" / "blog").mkdir(parents=True)
+    from core.templates import env
+
+    assert env.join_path("base.html", "blog/page.html") == "base.html"
+    (generated_app / "blog" / "templates" / "blog" / "base.html").write_text("blog base")
+    assert env.join_path("base.html", "blog/page.html") == "blog/base.html"
@@ -0,0 +1,38 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Ensure imports work from project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("alembic")
+
+from alembic.config import Config  # noqa: E402
+
+from archonkit.commands.migrations import run_with_report  # noqa: E402
+
+
+def make_config(tmp_path, env_py):
+    (tmp_path / "alembic").mkdir()
+    (tmp_path / "alembic" / "env.py").write_text(env_py)
+    cfg = Config()
+    cfg.set_main_option("script_location", str(tmp_path / "alembic"))
+    return cfg
+
+
+def test_run_with_report_warns_without_alembic_options(tmp_path, capsys):
+    """Without the env.py hook, migrate should say why no per-revision timings appear."""
+    cfg = make_config(tmp_path, "context.configure(connection=connection)\n")
+
+    run_with_report(cfg, lambda cfg, revision, sql: None, "head", False, None)
+
+    assert "alembic_options" in capsys.readouterr().err
+
+
+def test_run_with_report_is_quiet_when_hooked(tmp_path, capsys):
+    cfg = make_config(tmp_path, "context.configure(**alembic_options(config, connection))\n")
+
+    run_with_report(cfg, lambda cfg, revision, sql: None, "head", False, None)
+
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,67 @@
+import socket
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+# Ensure imports work from project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from archonkit.helpers import server  # noqa: E402
+
+
+def test_protocols_fall_back_when_accelerators_are_missing(monkeypatch):
+    """uvloop/httptools should only be picked when they can be imported."""
+    monkeypatch.setattr(server, "_available", lambda module: False)
+    assert (server.event_loop(), server.http_protocol()) == ("asyncio", "h11")
+
+    monkeypatch.setattr(server, "_available", lambda module: True)
+    assert (server.event_loop(), server.http_protocol()) == ("uvloop", "httptools")
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT unavailable")
+def test_workers_can_bind_the_same_port_with_reuse_port():
+    """Every worker binds its own listening socket on the shared port."""
+    first = server.bind_socket("127.0.0.1", 0, reuse_port=True)
+    port = first.getsockname()[1]
+    second = server.bind_socket("127.0.0.1", port, reuse_port=True)
+    try:
+        assert second.getsockname()[1] == port
+    finally:
+        first.close()
+        second.close()
+
+
+def test_dispose_engine_keeps_parent_connections_open(monkeypatch):
+    """After fork the pool is reset with close=False, for async engines too."""
+    calls = []
+
+    class Engine:
+        def dispose(self, close=True):
+            calls.append(close)
+
+    database = types.ModuleType("core.database")
+    database.engine = types.SimpleNamespace(sync_engine=Engine())
+    monkeypatch.setitem(sys.modules, "core.database", database)
+
+    server.dispose_engine()
+    assert calls == [False]
+
+
+def test_rss_bytes_is_positive():
+    """Memory recycling needs a usable RSS reading on this platform."""
+    assert server.rss_bytes() > 0
+
+
+def test_per_process_stores_flags_memory_backends(monkeypatch):
+    """In-memory sessions/messages can't be shared between forked workers."""
+    config = types.ModuleType("core.config")
+    config.settings = types.SimpleNamespace(
+        SESSION_BACKEND="sql", MESSAGE_STORAGE="server", MESSAGE_BACKEND="memory"
+    )
+    monkeypatch.setitem(sys.modules, "core.config", config)
+    assert server.per_process_stores() == ["MESSAGE_BACKEND=memory"]
+
+    config.settings.MESSAGE_STORAGE = "session"
+    assert server.per_process_stores() == []